@@ -0,0 +1,102 @@
+import csv
+import os
+import sys
+from multiprocessing import Pool
+
+from heredity import load_data
+from network import infer
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python batch.py (data.csv|directory) output.csv [processes]")
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    count = run(sys.argv[1], sys.argv[2], processes)
+    print(f"Wrote {count} families to {sys.argv[2]}")
+
+
+def sources(path):
+    """
+    Return the CSV files to read: `path` itself, or every `.csv` file
+    in it if `path` is a directory.
+    """
+    if not os.path.isdir(path):
+        return [path]
+    return [
+        os.path.join(path, filename)
+        for filename in sorted(os.listdir(path))
+        if filename.endswith(".csv")
+    ]
+
+
+def families(people):
+    """
+    Split `people` into connected families, linking everyone to their
+    mother and father. Return a list of dictionaries in the format
+    of `load_data`.
+    """
+    root = {name: name for name in people}
+
+    def find(name):
+        while root[name] != name:
+            root[name] = root[root[name]]
+            name = root[name]
+        return name
+
+    for name, person in people.items():
+        for parent in [person["mother"], person["father"]]:
+            if parent is not None:
+                root[find(parent)] = find(name)
+
+    result = dict()
+    for name, person in people.items():
+        result.setdefault(find(name), dict())[name] = person
+    return list(result.values())
+
+
+def tasks(path):
+    """
+    Generate `(family, people)` pairs for every family in the CSV files
+    at `path`, where `family` identifies the file and the family in it.
+    """
+    for filename in sources(path):
+        source = os.path.basename(filename)
+        for i, people in enumerate(families(load_data(filename))):
+            yield f"{source}:{i}", people
+
+
+def solve(task):
+    family, people = task
+    return family, infer(people)
+
+
+def run(path, output, processes=None):
+    """
+    Compute the gene and trait distribution of every family found at
+    `path` in a pool of `processes` workers and write one CSV row per
+    person to `output` as results arrive.
+
+    Return the number of families processed.
+    """
+    count = 0
+    with open(output, "w", newline="") as f, Pool(processes) as pool:
+        writer = csv.writer(f)
+        writer.writerow(["family", "name", "gene2", "gene1", "gene0", "trait"])
+        for family, probabilities in pool.imap(solve, tasks(path)):
+            for name, p in probabilities.items():
+                writer.writerow([
+                    family, name,
+                    f"{p['gene'][2]:.4f}",
+                    f"{p['gene'][1]:.4f}",
+                    f"{p['gene'][0]:.4f}",
+                    f"{p['trait'][True]:.4f}"
+                ])
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import csv
 import itertools
+import random
 import sys
 
 PROBS = {
@@ -36,13 +37,31 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Ways of computing the probabilities, selected on the command line
+METHODS = ["enumerate", "vectorized", "lazy", "likelihood"]
+
+# Number of samples drawn by the likelihood weighting method
+SAMPLES = 100000
+
+# Number of joint assignments evaluated at once by the vectorized method
+BATCH_SIZE = 1 << 16
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3, 4] or \
+            (len(sys.argv) >= 3 and sys.argv[2] not in METHODS):
+        sys.exit(
+            f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}] [samples]"
+        )
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) >= 3 else "enumerate"
+    samples = int(sys.argv[3]) if len(sys.argv) == 4 else SAMPLES
+
+    if method == "vectorized":
+        print_probabilities(people, vectorized_probabilities(people))
+        return
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -60,31 +79,49 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+    # Stream joint assignments from a generator
+    if method in ["lazy", "likelihood"]:
+        if method == "lazy":
+            stream = assignments(people)
+        else:
+            stream = likelihood_weighting(people, samples)
+        for one_gene, two_genes, have_trait, p in stream:
+            update(probabilities, one_gene, two_genes, have_trait, p)
+
+    else:
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+        # Loop over all sets of people who might have the trait
+        names = set(people)
+        for have_trait in powerset(names):
+
+            # Check if current set of people violates known information
+            fails_evidence = any(
+                (people[person]["trait"] is not None and
+                 people[person]["trait"] != (person in have_trait))
+                for person in names
+            )
+            if fails_evidence:
+                continue
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+            # Loop over all sets of people who might have the gene
+            for one_gene in powerset(names):
+                for two_genes in powerset(names - one_gene):
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+                    # Update probabilities with new joint probability
+                    p = joint_probability(people, one_gene, two_genes, have_trait)
+                    update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
 
     # Print results
+    print_probabilities(people, probabilities)
+
+
+def print_probabilities(people, probabilities):
+    """
+    Print the gene and trait distribution of every person.
+    """
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
@@ -183,6 +220,243 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     return result
 
 
+def parents_first(people):
+    """
+    Return the names in `people` ordered so that everyone comes after
+    their mother and father.
+    """
+    order = []
+    placed = set()
+
+    def place(name):
+        if name in placed:
+            return
+        for parent in [people[name]["mother"], people[name]["father"]]:
+            if parent is not None:
+                place(parent)
+        placed.add(name)
+        order.append(name)
+
+    for name in people:
+        place(name)
+    return order
+
+
+def inheritance_probability(copies, mother_copies, father_copies):
+    """
+    Return the probability of a child having `copies` copies of the gene,
+    given the number of copies of their mother and father.
+    """
+    passes = {
+        0: PROBS["mutation"],
+        1: 0.5,
+        2: 1 - PROBS["mutation"]
+    }
+    mother = passes[mother_copies]
+    father = passes[father_copies]
+    if copies == 0:
+        return (1 - mother) * (1 - father)
+    elif copies == 1:
+        return mother * (1 - father) + (1 - mother) * father
+    else:
+        return mother * father
+
+
+def assignments(people, threshold=0):
+    """
+    Generate every joint assignment consistent with the known traits
+    as tuples `(one_gene, two_genes, have_trait, p)`, where `p` is the
+    joint probability of the assignment.
+
+    People are assigned parents first, so the probability of a partial
+    assignment is known as it is built. Known traits are never varied,
+    and a partial assignment whose probability drops to `threshold` or
+    below is pruned together with all of its completions.
+    """
+    order = parents_first(people)
+    copies = dict()
+    one_gene = set()
+    two_genes = set()
+    have_trait = set()
+
+    def extend(k, p):
+        if k == len(order):
+            yield set(one_gene), set(two_genes), set(have_trait), p
+            return
+
+        person = order[k]
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        known = people[person]["trait"]
+        for gene in [0, 1, 2]:
+            if mother is None:
+                gene_p = PROBS["gene"][gene]
+            else:
+                gene_p = inheritance_probability(
+                    gene, copies[mother], copies[father]
+                )
+            copies[person] = gene
+            if gene == 1:
+                one_gene.add(person)
+            elif gene == 2:
+                two_genes.add(person)
+
+            for trait in [True, False] if known is None else [known]:
+                q = p * gene_p * PROBS["trait"][gene][trait]
+                if q <= threshold:
+                    continue
+                if trait:
+                    have_trait.add(person)
+                yield from extend(k + 1, q)
+                have_trait.discard(person)
+
+            one_gene.discard(person)
+            two_genes.discard(person)
+
+    yield from extend(0, 1)
+
+
+def likelihood_weighting(people, n):
+    """
+    Generate `n` joint assignments sampled by likelihood weighting as
+    tuples `(one_gene, two_genes, have_trait, weight)`.
+
+    Genes and unknown traits are sampled parents first from their
+    distributions, while every known trait is kept fixed and instead
+    weighs the sample by its probability.
+    """
+    order = parents_first(people)
+    for _ in range(n):
+        copies = dict()
+        have_trait = set()
+        weight = 1
+        for person in order:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            if mother is None:
+                weights = [PROBS["gene"][gene] for gene in [0, 1, 2]]
+            else:
+                weights = [
+                    inheritance_probability(gene, copies[mother], copies[father])
+                    for gene in [0, 1, 2]
+                ]
+            gene = random.choices([0, 1, 2], weights=weights)[0]
+            copies[person] = gene
+
+            known = people[person]["trait"]
+            if known is None:
+                trait = random.random() < PROBS["trait"][gene][True]
+            else:
+                trait = known
+                weight *= PROBS["trait"][gene][known]
+            if trait:
+                have_trait.add(person)
+
+        one_gene = set(p for p in copies if copies[p] == 1)
+        two_genes = set(p for p in copies if copies[p] == 2)
+        yield one_gene, two_genes, have_trait, weight
+
+
+def joint_probabilities(people, names, genes, traits):
+    """
+    Compute the log of the joint probability of many assignments at once.
+
+    `names` orders the people along the columns of the integer array
+    `genes` (copies of the gene, 0, 1 or 2) and the boolean array `traits`.
+    Each row of the two arrays is one assignment, as described
+    in `joint_probability`. Return an array with one log probability
+    per row.
+    """
+    import numpy as np
+
+    index = {name: i for i, name in enumerate(names)}
+    founder = np.array([people[name]["mother"] is None for name in names])
+    mothers = np.array([
+        index.get(people[name]["mother"], i) for i, name in enumerate(names)
+    ])
+    fathers = np.array([
+        index.get(people[name]["father"], i) for i, name in enumerate(names)
+    ])
+
+    gene_p = np.array([PROBS["gene"][copies] for copies in [0, 1, 2]])
+    trait_p = np.array([
+        [PROBS["trait"][copies][False], PROBS["trait"][copies][True]]
+        for copies in [0, 1, 2]
+    ])
+
+    # Probability of passing a copy of the gene to a child, indexed by
+    # the parent's number of copies
+    passes = np.array([PROBS["mutation"], 0.5, 1 - PROBS["mutation"]])
+    mother_p = passes[genes[:, mothers]]
+    father_p = passes[genes[:, fathers]]
+    inherited_p = np.choose(genes, [
+        (1 - mother_p) * (1 - father_p),
+        mother_p * (1 - father_p) + (1 - mother_p) * father_p,
+        mother_p * father_p
+    ])
+
+    p = np.where(founder, gene_p[genes], inherited_p) \
+        * trait_p[genes, traits.astype(int)]
+    return np.log(p).sum(axis=1)
+
+
+def vectorized_probabilities(people, batch_size=BATCH_SIZE):
+    """
+    Compute the gene and trait distribution of every person by evaluating
+    every joint assignment consistent with the known traits, `batch_size`
+    assignments at a time.
+
+    Joint probabilities are computed in log space and accumulated relative
+    to the largest one seen so far, so large families do not underflow.
+    Return a dictionary in the format built by `main`.
+    """
+    import numpy as np
+
+    names = list(people)
+    n = len(names)
+    known = np.array([people[name]["trait"] is not None for name in names])
+    evidence = np.array([bool(people[name]["trait"]) for name in names])
+    unknown = np.flatnonzero(~known)
+
+    gene_sum = np.zeros((n, 3))
+    trait_sum = np.zeros((n, 2))
+    shift = -np.inf
+
+    # Number every assignment: the gene copies of each person are the
+    # base-3 digits, the unknown traits the bits above them
+    total = 3 ** n * 2 ** len(unknown)
+    for start in range(0, total, batch_size):
+        k = np.arange(start, min(start + batch_size, total), dtype=np.int64)
+        genes = (k[:, None] // 3 ** np.arange(n)) % 3
+        traits = np.tile(evidence, (len(k), 1))
+        bits = k // 3 ** n
+        traits[:, unknown] = (bits[:, None] >> np.arange(len(unknown))) & 1
+
+        log_p = joint_probabilities(people, names, genes, traits)
+        if log_p.max() > shift:
+            gene_sum *= np.exp(shift - log_p.max())
+            trait_sum *= np.exp(shift - log_p.max())
+            shift = log_p.max()
+        p = np.exp(log_p - shift)
+
+        # Equivalent of `update` for the whole batch
+        for copies in [0, 1, 2]:
+            gene_sum[:, copies] += p @ (genes == copies)
+        trait_sum[:, 1] += p @ traits
+        trait_sum[:, 0] += p @ ~traits
+
+    # Equivalent of `normalize`
+    gene_sum /= gene_sum.sum(axis=1, keepdims=True)
+    trait_sum /= trait_sum.sum(axis=1, keepdims=True)
+    return {
+        name: {
+            "gene": {copies: gene_sum[i, copies] for copies in [2, 1, 0]},
+            "trait": {True: trait_sum[i, 1], False: trait_sum[i, 0]}
+        }
+        for i, name in enumerate(names)
+    }
+
+
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
     Add to `probabilities` a new joint probability `p`.
@@ -0,0 +1,212 @@
+import heapq
+import sys
+
+import numpy as np
+
+from heredity import PROBS, load_data, print_probabilities
+
+# Gene copies are indexed 0, 1, 2 along every factor axis
+GENES = [0, 1, 2]
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python network.py data.csv")
+    people = load_data(sys.argv[1])
+    print_probabilities(people, infer(people))
+
+
+def inheritance_table():
+    """
+    Return a 3 x 3 x 3 array `t` where `t[child, mother, father]` is the
+    probability of the child having `child` copies of the gene given the
+    number of copies of the mother and father.
+    """
+    mutation = PROBS["mutation"]
+
+    # Probability of passing the gene on, given the parent's copies
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    table = np.zeros((3, 3, 3))
+    table[0] = np.outer(1 - passes, 1 - passes)
+    table[1] = np.outer(passes, 1 - passes) + np.outer(1 - passes, passes)
+    table[2] = np.outer(passes, passes)
+    return table
+
+
+def factors(people, names):
+    """
+    Return the factors of the Bayesian network of a family as a list of
+    `(variables, table)` pairs, where `variables` are indices into `names`
+    (one gene variable per person) and `table` has one axis per variable.
+
+    Known traits are entered as evidence; unknown traits sum to 1 and
+    need no factor.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    prior = np.array([PROBS["gene"][g] for g in GENES])
+    inheritance = inheritance_table()
+
+    result = []
+    for name in names:
+        person = people[name]
+        i = index[name]
+        if person["mother"] is None:
+            result.append(((i,), prior))
+        else:
+            mother = index[person["mother"]]
+            father = index[person["father"]]
+            result.append(((i, mother, father), inheritance))
+        if person["trait"] is not None:
+            result.append((
+                (i,),
+                np.array([PROBS["trait"][g][person["trait"]] for g in GENES])
+            ))
+    return result
+
+
+def elimination_order(size, factors):
+    """
+    Return an elimination order for `size` variables greedily choosing
+    the variable whose elimination adds the fewest fill-in edges, along
+    with the clique created by eliminating each variable.
+    """
+    neighbors = [set() for _ in range(size)]
+    for variables, _ in factors:
+        for v in variables:
+            neighbors[v].update(u for u in variables if u != v)
+
+    def fill(v):
+        nbrs = list(neighbors[v])
+        return sum(
+            1 for a in range(len(nbrs)) for b in range(a + 1, len(nbrs))
+            if nbrs[b] not in neighbors[nbrs[a]]
+        )
+
+    def score(v):
+        return (fill(v), len(neighbors[v]), v)
+
+    # Scores only change near an eliminated variable, so keep them in a
+    # heap and skip entries that have gone stale
+    scores = {v: score(v) for v in range(size)}
+    heap = list(scores.values())
+    heapq.heapify(heap)
+
+    order = []
+    cliques = []
+    while heap:
+        entry = heapq.heappop(heap)
+        v = entry[2]
+        if scores.get(v) != entry:
+            continue
+        del scores[v]
+        nbrs = neighbors[v]
+        for u in nbrs:
+            neighbors[u].update(nbrs - {u})
+            neighbors[u].discard(v)
+        order.append(v)
+        cliques.append((v,) + tuple(sorted(nbrs)))
+
+        affected = set(nbrs)
+        for u in nbrs:
+            affected.update(neighbors[u])
+        for u in affected:
+            scores[u] = score(u)
+            heapq.heappush(heap, scores[u])
+    return order, cliques
+
+
+def multiply(variables, factors):
+    """
+    Return the product of `factors` as a table over `variables`.
+    """
+    # einsum only accepts a small number of distinct axis labels,
+    # so number the variables locally
+    labels = {v: i for i, v in enumerate(variables)}
+    covered = set()
+    operands = []
+    for scope, table in factors:
+        for v in scope:
+            labels.setdefault(v, len(labels))
+        covered.update(scope)
+        operands.extend([table, [labels[v] for v in scope]])
+
+    # Variables no factor depends on are uniform
+    for v in variables:
+        if v not in covered:
+            operands.extend([np.ones(3), [labels[v]]])
+    if not operands:
+        return np.ones(())
+    return np.einsum(*operands, [labels[v] for v in variables])
+
+
+def infer(people):
+    """
+    Compute the gene and trait distribution of every person in `people`
+    by junction-tree propagation over the family's Bayesian network.
+
+    Return a dictionary in the format built by `heredity.main`.
+    """
+    names = list(people)
+    network = factors(people, names)
+    order, cliques = elimination_order(len(names), network)
+    position = {v: k for k, v in enumerate(order)}
+
+    # Clique k was created by eliminating order[k]; its separator is
+    # the rest of the clique and its parent is the clique of the first
+    # separator variable eliminated afterwards
+    separators = [clique[1:] for clique in cliques]
+    parents = [
+        min((position[v] for v in separator), default=None)
+        for separator in separators
+    ]
+    children = [[] for _ in cliques]
+    for k, parent in enumerate(parents):
+        if parent is not None:
+            children[parent].append(k)
+
+    # Assign every factor to the clique of its first eliminated variable
+    potentials = [[] for _ in cliques]
+    for scope, table in network:
+        potentials[min(position[v] for v in scope)].append((scope, table))
+
+    # Collect messages from the leaves towards the roots
+    up = [None] * len(cliques)
+    for k, clique in enumerate(cliques):
+        incoming = potentials[k] + [up[c] for c in children[k]]
+        message = multiply(separators[k], incoming)
+        up[k] = (separators[k], message / message.sum())
+
+    # Distribute messages from the roots back to the leaves
+    down = [None] * len(cliques)
+    marginals = dict()
+    for k in reversed(range(len(cliques))):
+        clique = cliques[k]
+        incoming = potentials[k] + [up[c] for c in children[k]]
+        if down[k] is not None:
+            incoming.append(down[k])
+        belief = multiply(clique[:1], incoming)
+        marginals[clique[0]] = belief / belief.sum()
+        for c in children[k]:
+            others = [m for m in incoming if m is not up[c]]
+            message = multiply(separators[c], others)
+            down[c] = (separators[c], message / message.sum())
+
+    probabilities = dict()
+    for i, name in enumerate(names):
+        gene = marginals[i]
+        trait = people[name]["trait"]
+        if trait is None:
+            has = sum(gene[g] * PROBS["trait"][g][True] for g in GENES)
+        else:
+            has = 1.0 if trait else 0.0
+        probabilities[name] = {
+            "gene": {g: float(gene[g]) for g in reversed(GENES)},
+            "trait": {True: float(has), False: float(1 - has)}
+        }
+    return probabilities
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+import os
+import re
+import sys
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+import scipy.sparse
+
+from pagerank import DAMPING
+
+SAMPLES = 10000000
+SURFERS = 10000
+
+# Fewest samples taken by each surfer, and uncounted steps it takes first
+SAMPLES_PER_SURFER = 100
+BURN_IN = 100
+
+CHUNK_SIZE = 1 << 16
+TOLERANCE = 1e-8
+EPSILON = 1e-6
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python engine.py corpus [samples]")
+    samples = int(sys.argv[2]) if len(sys.argv) == 3 else SAMPLES
+    graph = crawl_graph(sys.argv[1])
+    ranks = sample_pagerank(graph, DAMPING, samples)
+    print(f"PageRank Results from Sampling (n = {samples})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+class Graph():
+
+    def __init__(self, pages, offsets, targets):
+        """
+        Create a compact link graph.
+
+        Pages are interned to integer IDs: `pages[i]` is the name of page `i`.
+        The links of page `i` are `targets[offsets[i]:offsets[i + 1]]`
+        (compressed sparse row layout).
+        """
+        self.pages = list(pages)
+        self.ids = {page: i for i, page in enumerate(self.pages)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.pages)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Graph.from_corpus(corpus) builds a graph from a dictionary mapping
+        each page to the set of pages it links to, as returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        ids = {page: i for i, page in enumerate(pages)}
+        offsets = [0]
+        targets = []
+        for page in pages:
+            targets.extend(sorted(ids[link] for link in corpus[page]))
+            offsets.append(len(targets))
+        return cls(pages, offsets, targets)
+
+    def to_corpus(self):
+        """
+        Return the graph as a dictionary mapping each page to the set
+        of pages it links to.
+        """
+        return {
+            page: set(self.pages[t] for t in self.links(i))
+            for i, page in enumerate(self.pages)
+        }
+
+    def save(self, filename):
+        """Save the graph to a `.npz` file."""
+        np.savez(
+            filename,
+            pages=np.array(self.pages, dtype=str),
+            offsets=self.offsets,
+            targets=self.targets
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Graph.load(filename) loads a graph saved with `save`."""
+        with np.load(filename) as data:
+            return cls(data["pages"].tolist(), data["offsets"], data["targets"])
+
+    def links(self, i):
+        """Return an array of page IDs linked to by page `i`."""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def outdegree(self):
+        """Return an array with the number of links of every page."""
+        return np.diff(self.offsets)
+
+    def transition_matrix(self):
+        """
+        Return the sparse N x N matrix whose column `j` spreads the rank
+        of page `j` evenly over its links. Columns of pages without links
+        are empty.
+        """
+        degree = self.outdegree()
+        sources = np.repeat(np.arange(len(self)), degree)
+        return scipy.sparse.csr_matrix(
+            (1 / degree[sources], (self.targets, sources)),
+            shape=(len(self), len(self))
+        )
+
+
+def crawl_graph(directory, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    Parse a directory of HTML pages into a `Graph`, extracting links from
+    the files in parallel with a pool of `processes` workers.
+
+    Every file is read in chunks of `chunk_size` characters, so no file
+    is ever held in memory as a whole. Only links to other pages in the
+    corpus are kept.
+    """
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    ids = {page: i for i, page in enumerate(pages)}
+    tasks = [
+        (i, os.path.join(directory, page), chunk_size)
+        for i, page in enumerate(pages)
+    ]
+
+    links = [None] * len(pages)
+    with Pool(processes, initializer=_init_worker, initargs=(ids,)) as pool:
+        for i, targets in pool.imap_unordered(_crawl_page, tasks, chunksize=16):
+            links[i] = targets
+
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(targets) for targets in links])
+    targets = np.concatenate(links) if links else np.zeros(0, dtype=np.int64)
+    return Graph(pages, offsets, targets)
+
+
+def extract_links(filename, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of link targets in an HTML file, reading it in
+    chunks of `chunk_size` characters.
+    """
+    links = set()
+    tail = ""
+    with open(filename) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buffer = tail + chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+
+            # Carry over a tag that is still open, it may be a link
+            # split across two chunks
+            start = buffer.rfind("<", end)
+            if start != -1 and buffer.find(">", start) == -1:
+                tail = buffer[start:]
+            else:
+                tail = ""
+    return links
+
+
+# Page name to ID mapping shared by the crawler worker processes
+_ids = None
+
+
+def _init_worker(ids):
+    global _ids
+    _ids = ids
+
+
+def _crawl_page(task):
+    i, filename, chunk_size = task
+    targets = set(
+        _ids[link] for link in extract_links(filename, chunk_size)
+        if link in _ids
+    )
+    targets.discard(i)
+    return i, np.array(sorted(targets), dtype=np.int64)
+
+
+def sample_pagerank(graph, damping_factor, n, surfers=SURFERS, seed=None,
+                    burn_in=BURN_IN):
+    """
+    Return PageRank values for each page by sampling `n` pages with up
+    to `surfers` independent random surfers walking the graph in
+    parallel, each starting on a page at random and taking `burn_in`
+    uncounted steps first.
+
+    There are at most `n // SAMPLES_PER_SURFER` surfers, so that every
+    surfer contributes a long walk rather than a few steps from its
+    random start.
+
+    A page without links is treated as linking to every page.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value. All PageRank values sum to 1.
+    """
+    rng = np.random.default_rng(seed)
+    size = len(graph)
+    degree = graph.outdegree()
+    surfers = max(1, min(surfers, n // SAMPLES_PER_SURFER))
+
+    def step(position):
+
+        # With probability `damping_factor` follow a link, otherwise
+        # (or when there is no link to follow) jump to any page
+        d = degree[position]
+        follow = (rng.random(surfers) < damping_factor) & (d > 0)
+        jump = rng.integers(size, size=surfers)
+        pick = (rng.random(surfers) * d).astype(np.int64)
+        index = np.where(follow, graph.offsets[position] + pick, 0)
+        return np.where(follow, graph.targets[index], jump) \
+            if len(graph.targets) else jump
+
+    position = rng.integers(size, size=surfers)
+    for _ in range(burn_in):
+        position = step(position)
+
+    counts = np.zeros(size, dtype=np.int64)
+    remaining = n
+    while remaining > 0:
+        position = step(position)
+        count = min(surfers, remaining)
+        counts += np.bincount(position[:count], minlength=size)
+        remaining -= count
+
+    return {page: float(counts[i] / n) for i, page in enumerate(graph.pages)}
+
+
+def iterate_pagerank(graph, damping_factor, ranks=None, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page by iteratively updating
+    PageRank values until no page changes by more than `tolerance` times
+    the average PageRank value 1 / N.
+
+    If `ranks` is given, iteration is warm-started from it (pages missing
+    from `ranks` start at 1 / N). Only pages whose value changed push
+    updates along their links, so a good starting point means little work.
+
+    Return a tuple `(ranks, iterations)` where `ranks` is a dictionary
+    mapping page names to their PageRank value.
+    """
+    size = len(graph)
+    degree = graph.outdegree()
+    dangling = degree == 0
+    share = damping_factor / np.where(dangling, 1, degree)
+    sources = np.repeat(np.arange(size), degree)
+
+    x = np.full(size, 1 / size)
+    if ranks is not None:
+        x = np.array([ranks.get(page, 1 / size) for page in graph.pages])
+        x /= x.sum()
+
+    # Rank received by every page through links and from dangling pages
+    received = np.bincount(
+        graph.targets, weights=(x * share)[sources], minlength=size
+    )
+    dangling_rank = x[dangling].sum()
+
+    iterations = 0
+    while True:
+        iterations += 1
+        new = (1 - damping_factor + damping_factor * dangling_rank) / size \
+            + received
+        delta = new - x
+        changed = np.flatnonzero(np.abs(delta) > tolerance / size)
+        if len(changed) == 0:
+            break
+
+        # Push the change of every changed page along its links
+        linking = changed[~dangling[changed]]
+        counts = degree[linking]
+        ends = np.cumsum(counts)
+        edges = np.arange(ends[-1] if len(ends) else 0) \
+            - np.repeat(ends - counts, counts) \
+            + np.repeat(graph.offsets[linking], counts)
+        np.add.at(
+            received, graph.targets[edges],
+            np.repeat(delta[linking] * share[linking], counts)
+        )
+        dangling_rank += delta[changed[dangling[changed]]].sum()
+        x[changed] = new[changed]
+
+    x /= x.sum()
+    return {page: float(x[i]) for i, page in enumerate(graph.pages)}, iterations
+
+
+def personalized_pagerank(graph, damping_factor, seeds, tolerance=TOLERANCE):
+    """
+    Return personalized PageRank values for many seed sets at once.
+
+    `seeds` is a list of sets of page names. The random surfer of seed
+    set `k` jumps (and leaves pages without links) to a page of that set
+    chosen at random instead of to any page of the corpus.
+
+    Return an N x K array whose column `k` holds the PageRank values for
+    `seeds[k]`; row `i` is page `graph.pages[i]`. Raise ValueError if a
+    seed set is empty or has a page not in the graph.
+    """
+    size = len(graph)
+    transition = graph.transition_matrix()
+    dangling = graph.outdegree() == 0
+
+    teleport = np.zeros((size, len(seeds)))
+    for k, pages in enumerate(seeds):
+        if not pages:
+            raise ValueError(f"seed set {k} is empty")
+        unknown = sorted(page for page in pages if page not in graph.ids)
+        if unknown:
+            raise ValueError(
+                f"seed set {k} has pages not in the graph: {', '.join(unknown)}"
+            )
+        rows = [graph.ids[page] for page in pages]
+        teleport[rows, k] = 1 / len(rows)
+
+    x = teleport.copy()
+    while True:
+        leaked = 1 - damping_factor + damping_factor * x[dangling].sum(axis=0)
+        new = damping_factor * (transition @ x) + teleport * leaked
+        if np.abs(new - x).max() <= tolerance:
+            return new
+        x = new
+
+
+def local_pagerank(graph, damping_factor, seed, epsilon=EPSILON):
+    """
+    Return an approximation of the personalized PageRank of a single
+    `seed` page, computed by pushing residual rank outwards from the seed.
+
+    Only pages near the seed are visited: a page pushes its residual
+    once it exceeds `epsilon` per link, so the work done is independent
+    of the size of the graph.
+
+    Return a dictionary mapping the visited pages to their PageRank value.
+    Raise ValueError if `seed` is not in the graph.
+    """
+    if seed not in graph.ids:
+        raise ValueError(f"seed page {seed} is not in the graph")
+    degree = graph.outdegree()
+    start = graph.ids[seed]
+    ranks = dict()
+    residual = {start: 1.0}
+    queue = deque([start])
+
+    while queue:
+        page = queue.popleft()
+        r = residual[page]
+        if r < epsilon * max(degree[page], 1):
+            continue
+        residual[page] = 0
+        ranks[page] = ranks.get(page, 0) + (1 - damping_factor) * r
+
+        # Pages without links hand their rank back to the seed
+        links = graph.links(page) if degree[page] else [start]
+        share = damping_factor * r / len(links)
+        for link in links:
+            residual[link] = residual.get(link, 0) + share
+            if residual[link] >= epsilon * max(degree[link], 1):
+                queue.append(link)
+
+    return {graph.pages[page]: rank for page, rank in ranks.items()}
+
+
+def apply_changes(graph, added_pages=(), removed_pages=(),
+                  added_links=(), removed_links=()):
+    """
+    Return a new graph with pages and links added or removed.
+    Links are `(page, target)` pairs. Links from or to removed pages,
+    and links to pages not in the graph, are dropped.
+    """
+    removed = set(removed_pages)
+    pages = sorted(
+        set(page for page in graph.pages if page not in removed)
+        | set(added_pages)
+    )
+    ids = {page: i for i, page in enumerate(pages)}
+    size = len(pages)
+
+    # Translate existing links to the new page IDs, dropping removed pages
+    renumber = np.array([ids.get(page, -1) for page in graph.pages] + [-1])
+    sources = renumber[np.repeat(np.arange(len(graph)), graph.outdegree())]
+    targets = renumber[graph.targets]
+    keep = (sources >= 0) & (targets >= 0)
+    keys = sources[keep] * size + targets[keep]
+
+    def encode(links):
+        return np.array([
+            ids[page] * size + ids[target] for page, target in links
+            if page in ids and target in ids and page != target
+        ], dtype=np.int64)
+
+    keys = np.union1d(keys, encode(added_links))
+    keys = keys[~np.isin(keys, encode(removed_links))]
+
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(keys // size, minlength=size))
+    return Graph(pages, offsets, keys % size)
+
+
+def save_ranks(filename, ranks):
+    """Save a dictionary of PageRank values to a `.npz` file."""
+    pages = sorted(ranks)
+    np.savez(
+        filename,
+        pages=np.array(pages, dtype=str),
+        ranks=np.array([ranks[page] for page in pages])
+    )
+
+
+def load_ranks(filename):
+    """Load a dictionary of PageRank values saved with `save_ranks`."""
+    with np.load(filename) as data:
+        return dict(zip(data["pages"].tolist(), data["ranks"].tolist()))
+
+
+def update_pagerank(graph, damping_factor, rank_file, compare=False,
+                    **changes):
+    """
+    Apply `changes` (see `apply_changes`) to `graph` and recompute its
+    PageRank, warm-starting from the ranks persisted in `rank_file`
+    (if it exists). The new ranks are written back to `rank_file`.
+
+    Return a tuple `(graph, ranks, stats)`. `stats` holds the number of
+    warm-started iterations and, if `compare` is True, the number of
+    iterations a cold start needs and how many were saved.
+    """
+    graph = apply_changes(graph, **changes)
+    previous = load_ranks(rank_file) if os.path.exists(rank_file) else None
+    ranks, iterations = iterate_pagerank(graph, damping_factor, previous)
+    save_ranks(rank_file, ranks)
+
+    stats = {"iterations": iterations}
+    if compare:
+        _, cold = iterate_pagerank(graph, damping_factor)
+        stats["cold_iterations"] = cold
+        stats["saved"] = cold - iterations
+    return graph, ranks, stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import sys
+import time
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+# Structures compared by default; only the densest, structure3, needs
+# backtracking without value ordering
+STRUCTURES = [
+    "data/structure0.txt",
+    "data/structure1.txt",
+    "data/structure2.txt",
+    "data/structure3.txt"
+]
+
+
+class UnorderedCreator(CrosswordCreator):
+
+    def order_domain_values(self, var, assignment):
+        """
+        Return the values in the domain of `var` in vocabulary order,
+        without the least-constraining-value heuristic.
+        """
+        return self.values(var)
+
+
+def run(creator_class, structure, words):
+    """
+    Solve a crossword and return the number of backtracks, the time
+    taken and whether a solution was found.
+    """
+    start = time.time()
+    creator = creator_class(Crossword(structure, words))
+    assignment = creator.solve()
+    return creator.backtracks, time.time() - start, assignment is not None
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py words [structure...]")
+    words = sys.argv[1]
+    structures = sys.argv[2:] or STRUCTURES
+
+    print(f"{'structure':24} {'ordering':10} {'backtracks':>10} {'seconds':>8}")
+    for structure in structures:
+        for name, creator_class in [
+            ("unordered", UnorderedCreator),
+            ("lcv", CrosswordCreator)
+        ]:
+            backtracks, seconds, solved = run(creator_class, structure, words)
+            result = "" if solved else " (no solution)"
+            print(f"{structure:24} {name:10} {backtracks:>10} {seconds:>8.3f}{result}")
+
+
+if __name__ == "__main__":
+    main()
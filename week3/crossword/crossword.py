@@ -1,3 +1,6 @@
+from vocabulary import Vocabulary
+
+
 class Variable():
 
     ACROSS = "across"
@@ -57,9 +60,8 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Open vocabulary index, built on first use
+        self.words = Vocabulary(words_file)
 
         # Determine variable set
         self.variables = set()
@@ -105,29 +107,29 @@ class Crossword():
                         ))
 
         # Compute overlaps for each word
-        # For any pair of variables v1, v2, their overlap is either:
-        #    None, if the two variables do not overlap; or
-        #    (i, j), where v1's ith character overlaps v2's jth character
+        # `overlaps[v1, v2]` is (i, j), where v1's ith character overlaps
+        # v2's jth character, for every pair of overlapping variables,
+        # found through the variables crossing each cell; other pairs are
+        # not stored, so `overlaps.get(v1, v2)` returns None for them
+        crossing = dict()
+        for var in self.variables:
+            for k, cell in enumerate(var.cells):
+                crossing.setdefault(cell, []).append((var, k))
         self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        for variables in crossing.values():
+            for v1, k1 in variables:
+                for v2, k2 in variables:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (k1, k2)
+
+        # Cache the neighbors and degree of each variable
+        self._neighbors = {var: set() for var in self.variables}
+        for v1, v2 in self.overlaps:
+            self._neighbors[v1].add(v2)
+        self.degrees = {
+            var: len(neighbors) for var, neighbors in self._neighbors.items()
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self._neighbors[var]
@@ -1,4 +1,5 @@
 import sys
+from collections import deque
 
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning) 
@@ -12,11 +13,42 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+
+        # Domains are bitsets over the words of the variable's length:
+        # bit `n` is set when word `n` of that length is still possible
+        self.vocabulary = self.crossword.words
         self.domains = {
-            var: self.crossword.words.copy()
+            var: self.vocabulary.all(var.length)
             for var in self.crossword.variables
         }
 
+        # Undo trail of `(var, domain)` pairs recording every domain
+        # before it was narrowed during search
+        self.trail = []
+
+        # Number of assignments undone during search
+        self.backtracks = 0
+
+    def indices(self, domain):
+        """
+        Return the list of word numbers in the bitset `domain`.
+        """
+        indices = []
+        while domain:
+            low = domain & -domain
+            indices.append(low.bit_length() - 1)
+            domain ^= low
+        return indices
+
+    def values(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        return [
+            self.vocabulary.word(var.length, n)
+            for n in self.indices(self.domains[var])
+        ]
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -98,14 +130,23 @@ class CrosswordCreator():
         #     print(f"{str(k):20} {len(v)}")
         return self.backtrack(dict())
 
+    def solve_all(self):
+        """
+        Enforce node and arc consistency, and then generate every
+        solution of the CSP.
+        """
+        self.enforce_node_consistency()
+        if self.ac3():
+            yield from self.solutions(dict())
+
     def enforce_node_consistency(self):
         """
         Update `self.domains` such that each variable is node-consistent.
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        for var, words in self.domains.items():
-            self.domains[var] = set(filter(lambda x: len(x) == var.length, words))
+        for var in self.domains:
+            self.domains[var] &= self.vocabulary.all(var.length)
 
     def revise(self, x, y):
         """
@@ -116,21 +157,24 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        # print("revise", x, y)
-        revised = False
-        revised_words = [word for word in self.domains[x]]    # copy
-        for word_x in self.domains[x]:
-            idx = self.crossword.overlaps[(x, y)]
-            if idx is None:
-                continue
-            word_y_matches = [word_x[idx[0]] == word_y[idx[1]] for word_y in self.domains[y]]
-            # print("XXX", word_x, any(word_y_matches), idx, self.domains[y])
-            if not any(word_y_matches):
-                revised_words.remove(word_x)
-                revised = True
-        # print("revised words", x, set(self.domains[x]) - set(revised_words))
-        self.domains[x] = revised_words
-        return revised
+        overlap = self.crossword.overlaps.get((x, y))
+        if overlap is None:
+            return False
+        i, j = overlap
+
+        # Keep the words of `x` whose letter at `i` is a letter some word
+        # of `y` has at `j`
+        letters_x = self.vocabulary.letters(x.length, i)
+        allowed = 0
+        for letter, words in self.vocabulary.letters(y.length, j).items():
+            if self.domains[y] & words:
+                allowed |= letters_x.get(letter, 0)
+
+        revised = self.domains[x] & allowed
+        if revised == self.domains[x]:
+            return False
+        self.narrow(x, revised)
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -141,28 +185,62 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
-        # print("arcs", arcs)
-        # print("variables", self.crossword.variables)
-
         if arcs is None:
-            arcs = [(x, y) for (x, y), v in self.crossword.overlaps.items() 
-                        if v is not None]
-
-        #XXXXXXXXX
-        for (x, y) in arcs:
+            arcs = list(self.crossword.overlaps)
+
+        # Queue of arcs still to revise, each queued at most once
+        queue = deque(arcs)
+        queued = set(arcs)
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
             if self.revise(x, y):
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
                     return False
                 for z in self.crossword.neighbors(x):
-                    if z == y:
-                        continue
-                    #print("XXX adding more", (z, x))
-                    arcs.append((z, x))
-        #XXXXXXXXX
-        # print("arcs", arcs)
-        # print(f"{self.domains=}")
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
         return True
 
+    def narrow(self, var, domain):
+        """
+        Replace the domain of `var` with `domain`, recording the old
+        domain on the trail so that `undo` can restore it.
+        """
+        self.trail.append((var, self.domains[var]))
+        self.domains[var] = domain
+
+    def undo(self, mark):
+        """
+        Restore every domain narrowed since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
+    def infer(self, var, word, assignment):
+        """
+        Maintain arc consistency after assigning `word` to `var`: reduce
+        the domain of `var` to `word`, remove `word` from every other
+        unassigned variable, and propagate with AC-3 from the neighbors
+        of `var`.
+
+        Return False if some domain ends up empty.
+        """
+        bit = 1 << self.vocabulary.index(word)
+        self.narrow(var, bit)
+        for other in self.crossword.variables:
+            if other not in assignment and other.length == var.length \
+                    and self.domains[other] & bit:
+                self.narrow(other, self.domains[other] & ~bit)
+                if not self.domains[other]:
+                    return False
+        return self.ac3([
+            (z, var) for z in self.crossword.neighbors(var)
+            if z not in assignment
+        ])
+
     def assignment_complete(self, assignment):
         """
         Return True if `assignment` is complete (i.e., assigns a value to each
@@ -186,7 +264,7 @@ class CrosswordCreator():
             for y, word_y in assignment.items():
                 if x == y:
                     continue
-                idx = self.crossword.overlaps[(x, y)]
+                idx = self.crossword.overlaps.get((x, y))
                 if idx is None:
                     continue
                 matches = word_x[idx[0]] == word_y[idx[1]]
@@ -196,6 +274,18 @@ class CrosswordCreator():
                     return False
         return True
 
+    def consistent_with(self, var, word, assignment):
+        """
+        Return True if assigning `word` to `var` keeps the consistent
+        `assignment` consistent; only the neighbors of `var` need checking.
+        """
+        for y in self.crossword.neighbors(var):
+            if y in assignment:
+                i, j = self.crossword.overlaps[var, y]
+                if word[i] != assignment[y][j]:
+                    return False
+        return word not in assignment.values()
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -203,21 +293,45 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        return self.domains[var]
-
-        conflicts = {}
-        for word in self.domains[var]:
-            nok = 0
-            for n in self.crossword.neighbors(var):
-                for word_n in self.domains[n]:
-                    assignment_ = {n: word_n, var: word}
-                    if not self.consistent(assignment_):
-                        nok += 1
-            conflicts[word] = nok 
-        # for (k, _) in sorted(conflicts.items(), key=lambda x: x[1]):
-        #     v = conflicts[k]
-        #     print(k, v)
-        return [k for k, _ in sorted(conflicts.items(), key=lambda x: x[1])]
+        conflicts = self.conflicts(var, assignment)
+        return sorted(conflicts, key=conflicts.get)
+
+    def conflicts(self, var, assignment):
+        """
+        Return a dictionary mapping each value in the domain of `var` to
+        the number of values it rules out for unassigned neighbors.
+        """
+        neighbors = [
+            (n, self.crossword.overlaps[var, n])
+            for n in self.crossword.neighbors(var)
+            if n not in assignment
+        ]
+
+        # For every neighbor, count how many of its words have each letter
+        # at the overlap: a word of `var` rules out all the others
+        histograms = []
+        for n, (i, j) in neighbors:
+            domain = self.domains[n]
+            letters = self.vocabulary.letters(n.length, j)
+            histograms.append((n, i, j, domain.bit_count(), {
+                letter: (domain & matching).bit_count()
+                for letter, matching in letters.items()
+            }))
+
+        conflicts = dict()
+        for index in self.indices(self.domains[var]):
+            word = self.vocabulary.word(var.length, index)
+            count = 0
+            for n, i, j, size, histogram in histograms:
+                count += size - histogram.get(word[i], 0)
+
+                # The same word cannot be used twice, which only rules it
+                # out for a neighbor if its letters there agree
+                if n.length == var.length and word[j] == word[i] \
+                        and self.domains[n] >> index & 1:
+                    count += 1
+            conflicts[word] = count
+        return conflicts
 
     def select_unassigned_variable(self, assignment):
         """
@@ -227,25 +341,13 @@ class CrosswordCreator():
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
         """
-        unassigned = [var for var in self.crossword.variables 
-                        if var not in assignment]
-        values_remaining = [(var, len(self.domains[var])) for var in unassigned]
-        min_remaining = min([length for (_, length) in values_remaining])
-        # print(values_remaining)
-        values_remaining = [var for (var, length) in values_remaining 
-                            if length == min_remaining]
-        if len(values_remaining) == 1:
-            return values_remaining[0]
-        else:
-            # choose highest degree
-            overlaps = [(x, y) for (x, y), v in self.crossword.overlaps.items() 
-                        if v is not None and x in values_remaining]
-            overlaps_len = {}
-            for (x, _) in overlaps:
-                overlaps_len[x] = len([x2 for (x2, _) in overlaps if x == x2])
-                overlaps_sorted = sorted(overlaps_len.items(), key=lambda x: x[1], reverse=True)
-                # print("overlaps_sorted", overlaps_sorted)
-                return overlaps_sorted[0][0]
+        return min(
+            (var for var in self.crossword.variables if var not in assignment),
+            key=lambda var: (
+                self.domains[var].bit_count(),
+                -self.crossword.degrees[var]
+            )
+        )
 
     def backtrack(self, assignment):
         """
@@ -256,22 +358,45 @@ class CrosswordCreator():
 
         If no assignment is possible, return None.
         """
-        # print(f"{assignment=}")
-        # print(f"{self.domains=}")
-
         if self.assignment_complete(assignment):
             return assignment
-        
+
         var = self.select_unassigned_variable(assignment)
 
         for word in self.order_domain_values(var, assignment):
-            # print(f"{var=}, {word=}")
+            if not self.consistent_with(var, word, assignment):
+                continue
+            mark = len(self.trail)
             assignment[var] = word
-            if self.consistent(assignment):
-                # print("consistent", var, word)
+            if self.infer(var, word, assignment):
                 result = self.backtrack(assignment)
                 if result:
                     return result
+            self.undo(mark)
+            del assignment[var]
+            self.backtracks += 1
+        return None
+
+    def solutions(self, assignment):
+        """
+        Generate every complete assignment extending the partial
+        `assignment`, each as a new dictionary, in the order
+        `backtrack` would find them.
+        """
+        if self.assignment_complete(assignment):
+            yield dict(assignment)
+            return
+
+        var = self.select_unassigned_variable(assignment)
+
+        for word in self.order_domain_values(var, assignment):
+            if not self.consistent_with(var, word, assignment):
+                continue
+            mark = len(self.trail)
+            assignment[var] = word
+            if self.infer(var, word, assignment):
+                yield from self.solutions(assignment)
+            self.undo(mark)
             del assignment[var]
 
 
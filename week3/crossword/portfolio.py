@@ -0,0 +1,122 @@
+import os
+import random
+import sys
+from multiprocessing import Pool
+
+from crossword import Crossword
+from generate import CrosswordCreator
+from vocabulary import Vocabulary
+
+# Backtracks allowed before the first restart; doubled after each restart
+CUTOFF = 100
+
+
+class Restart(Exception):
+    pass
+
+
+class RandomizedCreator(CrosswordCreator):
+
+    def __init__(self, crossword, seed, cutoff=None):
+        """
+        Create a crossword generator that breaks ties between variables
+        and between values at random, and gives up with `Restart` after
+        `cutoff` backtracks.
+        """
+        super().__init__(crossword)
+        self.random = random.Random(seed)
+        self.cutoff = cutoff
+
+    def order_domain_values(self, var, assignment):
+        """
+        Order values by the number of values they rule out for neighboring
+        variables, breaking ties at random.
+        """
+        conflicts = self.conflicts(var, assignment)
+        noise = {word: self.random.random() for word in conflicts}
+        return sorted(conflicts, key=lambda word: (conflicts[word], noise[word]))
+
+    def select_unassigned_variable(self, assignment):
+        """
+        Choose the unassigned variable with the fewest remaining values,
+        then the highest degree, breaking remaining ties at random.
+        """
+        return min(
+            (var for var in self.crossword.variables if var not in assignment),
+            key=lambda var: (
+                self.domains[var].bit_count(),
+                -self.crossword.degrees[var],
+                self.random.random()
+            )
+        )
+
+    def backtrack(self, assignment):
+        if self.cutoff is not None and self.backtracks > self.cutoff:
+            raise Restart
+        return super().backtrack(assignment)
+
+
+def solve_with_restarts(structure, words, seed, cutoff=CUTOFF):
+    """
+    Solve a crossword with randomized backtracking search, restarting
+    with a new random ordering and twice the cutoff whenever a search
+    runs out of backtracks.
+
+    Return the solution, or None if there is none.
+    """
+    crossword = Crossword(structure, words)
+    rng = random.Random(seed)
+    while True:
+        creator = RandomizedCreator(crossword, rng.random(), cutoff)
+        try:
+            return creator.solve()
+        except Restart:
+            cutoff *= 2
+
+
+def search(task):
+    structure, words, seed = task
+    return solve_with_restarts(structure, words, seed)
+
+
+def portfolio(structure, words, processes=None, seed=None):
+    """
+    Run randomized searches with restarts in a pool of `processes`
+    workers and return the first solution found by any of them,
+    or None if there is none.
+    """
+    rng = random.Random(seed)
+    processes = processes or os.cpu_count()
+
+    # Build the index of the words before the workers open it
+    Vocabulary(words)
+
+    tasks = [(structure, words, rng.random()) for _ in range(processes)]
+    with Pool(processes) as pool:
+
+        # Every search is complete, so the first answer is final
+        for assignment in pool.imap_unordered(search, tasks):
+            pool.terminate()
+            return assignment
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python portfolio.py structure words [processes]")
+    structure = sys.argv[1]
+    words = sys.argv[2]
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    assignment = portfolio(structure, words, processes)
+
+    # Print result
+    if assignment is None:
+        print("No solution.")
+    else:
+        CrosswordCreator(Crossword(structure, words)).print(assignment)
+
+
+if __name__ == "__main__":
+    main()
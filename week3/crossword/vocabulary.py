@@ -0,0 +1,229 @@
+import io
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+# Index files start with this tag followed by the position and size of
+# the JSON header describing the layout and the words file it was built
+# from, which is written last
+MAGIC = b"XWORDIDX"
+PREAMBLE = struct.Struct("<8sQQ")
+
+
+class Vocabulary():
+
+    def __init__(self, words_file):
+        """
+        Open the index of a words file, building it first if it does
+        not exist yet, cannot be read or was built from a different
+        version of the words file.
+
+        If the index cannot be written next to the words file, it is
+        built in memory instead.
+
+        The index groups the words by length; within a length, word `n`
+        is the `n`th word in sorted order, and sets of words are bitsets
+        with bit `n` set for word `n`.
+        """
+        self.words_file = words_file
+        self.index_file = words_file + ".index"
+        if not self.load(source(words_file)):
+            try:
+                build(words_file, self.index_file)
+                loaded = self.load(source(words_file))
+            except OSError:
+                loaded = False
+            if not loaded:
+                f = io.BytesIO()
+                write_index(f, *read_words(words_file))
+                self.read(f.getvalue(), None)
+
+        # Bitsets decoded so far, keyed by `(length, position)`
+        self.cache = dict()
+
+    def load(self, words_source):
+        """
+        Map the index file into memory and read its header.
+
+        Return False if the file is missing, is not a complete vocabulary
+        index or was built from a words file other than `words_source`.
+        """
+        try:
+            with open(self.index_file, "rb") as f:
+                if os.fstat(f.fileno()).st_size < PREAMBLE.size:
+                    return False
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+        return self.read(data, words_source)
+
+    def read(self, data, words_source):
+        """
+        Use the index in `data` if it is complete and, unless
+        `words_source` is None, was built from `words_source`.
+
+        Return whether it was used.
+        """
+        magic, start, size = PREAMBLE.unpack_from(data)
+        if magic != MAGIC or start + size > len(data):
+            return False
+        try:
+            header = json.loads(data[start:start + size])
+        except ValueError:
+            return False
+        if not isinstance(header, dict) or "groups" not in header:
+            return False
+        if words_source is not None and header.get("source") != words_source:
+            return False
+        self.data = data
+        self.groups = {
+            int(length): group for length, group in header["groups"].items()
+        }
+        return True
+
+    def __len__(self):
+        return sum(group["count"] for group in self.groups.values())
+
+    def count(self, length):
+        """Return the number of words of length `length`."""
+        group = self.groups.get(length)
+        return group["count"] if group else 0
+
+    def all(self, length):
+        """Return the bitset of all words of length `length`."""
+        return (1 << self.count(length)) - 1
+
+    def word(self, length, n):
+        """Return word `n` of length `length`."""
+        group = self.groups[length]
+        start, end = struct.unpack_from(
+            "=2Q", self.data, group["offsets"] + 8 * n
+        )
+        strings = group["strings"]
+        return self.data[strings + start:strings + end].decode()
+
+    def index(self, word):
+        """Return the number of `word` among the words of its length."""
+        low, high = 0, self.count(len(word))
+        while low < high:
+            middle = (low + high) // 2
+            if self.word(len(word), middle) < word:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count(len(word)) or self.word(len(word), low) != word:
+            raise KeyError(word)
+        return low
+
+    def letters(self, length, position):
+        """
+        Return a dictionary mapping each letter to the bitset of words of
+        length `length` with that letter at `position`.
+        """
+        key = (length, position)
+        if key not in self.cache:
+            group = self.groups.get(length)
+            size = (self.count(length) + 7) // 8
+            self.cache[key] = {
+                letter: int.from_bytes(
+                    self.data[offset:offset + size], "little"
+                )
+                for letter, offset in (
+                    group["letters"][position].items() if group else []
+                )
+            }
+        return self.cache[key]
+
+
+def source(words_file):
+    """
+    Return the size and modification time of a words file, which an
+    index records to tell whether it is up to date.
+    """
+    stat = os.stat(words_file)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def read_words(words_file):
+    """
+    Return the words of a words file as lists of sorted words keyed by
+    length, along with the `source` of the file they were read from.
+    """
+    words_source = source(words_file)
+    with open(words_file) as f:
+        words = set(f.read().upper().splitlines())
+    words.discard("")
+
+    groups = dict()
+    for word in sorted(words):
+        groups.setdefault(len(word), []).append(word)
+    return groups, words_source
+
+
+def build(words_file, index_file):
+    """
+    Read a words file and write its index to `index_file`.
+
+    The index is written to a temporary file first and then renamed, so
+    that other processes opening `index_file` meanwhile never see it
+    partly written.
+    """
+    groups, words_source = read_words(words_file)
+    fd, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(index_file)),
+        prefix=os.path.basename(index_file) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_index(f, groups, words_source)
+        os.replace(temporary, index_file)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def write_index(f, groups, words_source):
+    """
+    Write the index of `groups`, lists of sorted words keyed by length,
+    read from a words file with source `words_source`, to the binary
+    file `f`.
+    """
+    f.write(PREAMBLE.pack(MAGIC, 0, 0))
+
+    # Write the word strings, their offsets and the letter bitsets of
+    # every length, recording where each of them starts
+    header = dict()
+    for length, group in groups.items():
+        encoded = [word.encode() for word in group]
+        offsets = array("Q", [0])
+        for word in encoded:
+            offsets.append(offsets[-1] + len(word))
+
+        size = (len(group) + 7) // 8
+        bitsets = [dict() for _ in range(length)]
+        for n, word in enumerate(group):
+            for k, letter in enumerate(word):
+                if letter not in bitsets[k]:
+                    bitsets[k][letter] = bytearray(size)
+                bitsets[k][letter][n >> 3] |= 1 << (n & 7)
+
+        entry = {"count": len(group), "strings": f.tell()}
+        f.write(b"".join(encoded))
+        entry["offsets"] = f.tell()
+        f.write(offsets.tobytes())
+        entry["letters"] = []
+        for letters in bitsets:
+            entry["letters"].append(dict())
+            for letter, bits in sorted(letters.items()):
+                entry["letters"][-1][letter] = f.tell()
+                f.write(bits)
+        header[length] = entry
+
+    start = f.tell()
+    encoded = json.dumps({"source": words_source, "groups": header}).encode()
+    f.write(encoded)
+    f.seek(0)
+    f.write(PREAMBLE.pack(MAGIC, start, len(encoded)))
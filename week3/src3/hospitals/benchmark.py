@@ -0,0 +1,55 @@
+import random
+import sys
+
+from hospitals import Space, linear_schedule
+
+# Seconds at which the best cost of every run is compared
+CHECKPOINTS = [0.01, 0.03, 0.1, 0.3, 1, 3]
+
+
+def create_space():
+    """Creates a space with houses placed at random."""
+    random.seed(0)
+    space = Space(height=100, width=100, num_hospitals=10)
+    for i in range(1000):
+        space.add_house(random.randrange(space.height), random.randrange(space.width))
+    return space
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python benchmark.py [runs]")
+    runs = int(sys.argv[1]) if len(sys.argv) == 2 else 5
+
+    algorithms = {
+        "hill climb": lambda space: space.hill_climb(),
+        "first choice": lambda space: space.first_choice_hill_climb(),
+        "stochastic": lambda space: space.stochastic_hill_climb(),
+        "annealing": lambda space: space.simulated_annealing(
+            maximum=20000, schedule=linear_schedule(200, 20000)
+        ),
+        "tabu": lambda space: space.tabu_search(maximum=300)
+    }
+
+    print(f"{'algorithm':14}" + "".join(f"{t:>9}s" for t in CHECKPOINTS))
+    for name, algorithm in algorithms.items():
+
+        # Mean over all runs of the best cost reached by each checkpoint
+        curve = [0] * len(CHECKPOINTS)
+        for run in range(runs):
+            # Every algorithm starts from the same state in a given run
+            space = create_space()
+            random.seed(run)
+            algorithm(space)
+            for k, checkpoint in enumerate(CHECKPOINTS):
+                curve[k] += min(
+                    cost for seconds, cost in space.history
+                    if seconds <= checkpoint
+                ) / runs
+        print(f"{name:14}" + "".join(f"{cost:>10.0f}" for cost in curve))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,19 @@
+import math
+import queue
 import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from multiprocessing import Pool
+
+import numpy as np
+
+# Layout of generated images, in pixels
+CELL_SIZE = 100
+CELL_BORDER = 2
+COST_SIZE = 40
+PADDING = 10
 
 
 class Space():
@@ -9,104 +24,381 @@ class Space():
         self.width = width
         self.num_hospitals = num_hospitals
         self.houses = set()
-        self.hospitals = set()
+        self._hospitals = set()
+
+        # Image of the grid and houses, drawn on first use
+        self.background = None
+
+        # Index of cells not used by a house or hospital: cell numbers
+        # `free[:available]` are the available cells, and `where[cell]`
+        # is the position of `cell` in `free`
+        self.free = np.arange(height * width)
+        self.where = np.arange(height * width)
+        self.available = height * width
+
+    @property
+    def hospitals(self):
+        return self._hospitals
+
+    @hospitals.setter
+    def hospitals(self, hospitals):
+        for hospital in self._hospitals:
+            self.release(hospital)
+        self._hospitals = set(hospitals)
+        for hospital in self._hospitals:
+            self.occupy(hospital)
 
     def add_house(self, row, col):
         """Add a house at a particular location in state space."""
         self.houses.add((row, col))
+        self.occupy((row, col))
+        self.background = None
+
+    def add_hospital(self, cell):
+        """Add a hospital at an available cell."""
+        self._hospitals.add(cell)
+        self.occupy(cell)
+
+    def remove_hospital(self, cell):
+        """Remove the hospital at `cell`."""
+        self._hospitals.remove(cell)
+        self.release(cell)
+
+    def occupy(self, cell):
+        """Mark `cell` as used, swapping it out of the available cells."""
+        n = cell[0] * self.width + cell[1]
+        i = self.where[n]
+        if i >= self.available:
+            return
+        self.available -= 1
+        self.swap(i, self.available)
+
+    def release(self, cell):
+        """Mark `cell` as available again."""
+        n = cell[0] * self.width + cell[1]
+        i = self.where[n]
+        if i < self.available:
+            return
+        self.swap(i, self.available)
+        self.available += 1
+
+    def swap(self, i, j):
+        """Swap positions `i` and `j` of the free cell index."""
+        a, b = self.free[i], self.free[j]
+        self.free[i], self.free[j] = b, a
+        self.where[a], self.where[b] = j, i
+
+    def is_available(self, cell):
+        """Returns whether `cell` is not used by a house or hospital."""
+        return self.where[cell[0] * self.width + cell[1]] < self.available
+
+    def random_space(self):
+        """Returns a random cell not used by a house or hospital."""
+        n = self.free[random.randrange(self.available)]
+        return (int(n // self.width), int(n % self.width))
 
     def available_spaces(self):
         """Returns all cells not currently used by a house or hospital."""
-
-        # Consider all possible cells
-        candidates = set(
-            (row, col)
-            for row in range(self.height)
-            for col in range(self.width)
+        return set(
+            (int(n // self.width), int(n % self.width))
+            for n in self.free[:self.available]
         )
 
-        # Remove all houses and hospitals
-        for house in self.houses:
-            candidates.remove(house)
-        for hospital in self.hospitals:
-            candidates.remove(hospital)
-        return candidates
-
-    def hill_climb(self, maximum=None, image_prefix=None, log=False):
-        """Performs hill-climbing to find a solution."""
+    def hill_climb(self, maximum=None, image_prefix=None, log=False,
+                   animation=None):
+        """
+        Performs hill-climbing to find a solution, writing an image of
+        every step to numbered files starting with `image_prefix` and to
+        the animated image `animation` if given.
+        """
+        with Frames(self, image_prefix, animation) as frames:
+            return self.climb(maximum, frames, log)
+
+    def climb(self, maximum, frames, log):
+        """Performs hill-climbing, adding every step to `frames`."""
         count = 0
+        self.iterations = 0
 
         # Start by initializing hospitals randomly
-        self.hospitals = set()
-        for i in range(self.num_hospitals):
-            self.hospitals.add(random.choice(list(self.available_spaces())))
+        self.initialize()
         if log:
             print("Initial state: cost", self.get_cost(self.hospitals))
-        if image_prefix:
-            self.output_image(f"{image_prefix}{str(count).zfill(3)}.png")
+        frames.add(count)
+
+        # Keep track of distances from houses to hospitals
+        distances = Distances(self.houses, self.hospitals)
+        self.start_history(distances.cost())
 
         # Continue until we reach maximum number of iterations
         while maximum is None or count < maximum:
             count += 1
-            best_neighbors = []
-            best_neighbor_cost = None
-
-            # Consider all hospitals to move
-            for hospital in self.hospitals:
+            self.iterations = count
 
-                # Consider all neighbors for that hospital
-                for replacement in self.get_neighbors(*hospital):
-
-                    # Generate a neighboring set of hospitals
-                    neighbor = self.hospitals.copy()
-                    neighbor.remove(hospital)
-                    neighbor.add(replacement)
-
-                    # Check if neighbor is best so far
-                    cost = self.get_cost(neighbor)
-                    if best_neighbor_cost is None or cost < best_neighbor_cost:
-                        best_neighbor_cost = cost
-                        best_neighbors = [neighbor]
-                    elif best_neighbor_cost == cost:
-                        best_neighbors.append(neighbor)
+            # Consider all neighbors of all hospitals, costing each move
+            # from the distances that change
+            moves = self.moves()
+            if not moves:
+                return self.hospitals
+            costs = distances.move_costs(moves)
+            best_neighbor_cost = costs.min()
 
             # None of the neighbors are better than the current state
-            if best_neighbor_cost >= self.get_cost(self.hospitals):
+            if best_neighbor_cost >= distances.cost():
                 return self.hospitals
 
             # Move to a highest-valued neighbor
             else:
                 if log:
                     print(f"Found better neighbor: cost {best_neighbor_cost}")
-                self.hospitals = random.choice(best_neighbors)
+                best_moves = np.flatnonzero(costs == best_neighbor_cost)
+                self.relocate(distances, *moves[random.choice(best_moves)])
+                self.record(distances.cost())
 
             # Generate image
-            if image_prefix:
-                self.output_image(f"{image_prefix}{str(count).zfill(3)}.png")
+            frames.add(count)
+
+    def first_choice_hill_climb(self, maximum=None, log=False):
+        """
+        Performs hill-climbing, moving to the first better neighbor found
+        when trying neighbors in random order.
+        """
+        self.initialize()
+        distances = Distances(self.houses, self.hospitals)
+        self.start_history(distances.cost())
+
+        count = 0
+        while maximum is None or count < maximum:
+            count += 1
+            moves = self.moves()
+            random.shuffle(moves)
+            cost = distances.cost()
+            for move in moves:
+                if distances.move_costs([move])[0] < cost:
+                    break
+
+            # None of the neighbors are better than the current state
+            else:
+                return self.hospitals
+
+            self.relocate(distances, *move)
+            self.record(distances.cost())
+            if log:
+                print(f"Found better neighbor: cost {distances.cost()}")
+        return self.hospitals
+
+    def stochastic_hill_climb(self, maximum=None, log=False):
+        """
+        Performs hill-climbing, moving to a random better neighbor.
+        """
+        self.initialize()
+        distances = Distances(self.houses, self.hospitals)
+        self.start_history(distances.cost())
+
+        count = 0
+        while maximum is None or count < maximum:
+            count += 1
+            moves = self.moves()
+            if not moves:
+                return self.hospitals
+            better = np.flatnonzero(distances.move_costs(moves) < distances.cost())
 
-    def random_restart(self, maximum, image_prefix=None, log=False):
+            # None of the neighbors are better than the current state
+            if len(better) == 0:
+                return self.hospitals
+
+            self.relocate(distances, *moves[random.choice(better)])
+            self.record(distances.cost())
+            if log:
+                print(f"Found better neighbor: cost {distances.cost()}")
+        return self.hospitals
+
+    def simulated_annealing(self, maximum=1000, schedule=None, log=False):
+        """
+        Performs simulated annealing for `maximum` steps: a random
+        neighbor is always accepted if it is better, and accepted with
+        probability e^(-increase / temperature) if it is worse, where
+        `schedule(step)` gives the temperature at each step.
+
+        Returns the best state found.
+        """
+        if schedule is None:
+            schedule = exponential_schedule()
+        self.initialize()
+        distances = Distances(self.houses, self.hospitals)
+        self.start_history(distances.cost())
+        best_hospitals = self.hospitals.copy()
+        best_cost = distances.cost()
+
+        for step in range(maximum):
+            hospital = random.choice(list(self.hospitals))
+            neighbors = self.get_neighbors(*hospital)
+            if not neighbors:
+                continue
+            replacement = random.choice(neighbors)
+
+            increase = distances.move_costs([(hospital, replacement)])[0] \
+                - distances.cost()
+            temperature = schedule(step)
+            if increase < 0 or (
+                temperature > 0 and
+                random.random() < math.exp(-increase / temperature)
+            ):
+                self.relocate(distances, hospital, replacement)
+                if distances.cost() < best_cost:
+                    best_cost = distances.cost()
+                    best_hospitals = self.hospitals.copy()
+                    if log:
+                        print(f"{step}: Found new best state: cost {best_cost}")
+            self.record(best_cost)
+
+        self.hospitals = best_hospitals
+        return self.hospitals
+
+    def tabu_search(self, maximum=100, tenure=10, log=False):
+        """
+        Performs tabu search for `maximum` steps: always move to the best
+        neighbor, even if it is worse, but never back onto one of the
+        last `tenure` cells a hospital left, unless that would give a
+        new best state.
+
+        Returns the best state found.
+        """
+        self.initialize()
+        distances = Distances(self.houses, self.hospitals)
+        self.start_history(distances.cost())
+        best_hospitals = self.hospitals.copy()
+        best_cost = distances.cost()
+        tabu = deque(maxlen=tenure)
+
+        for step in range(maximum):
+            moves = self.moves()
+            if not moves:
+                break
+            costs = distances.move_costs(moves)
+            allowed = np.array([
+                replacement not in tabu or cost < best_cost
+                for (_, replacement), cost in zip(moves, costs)
+            ])
+            if not allowed.any():
+                break
+            cost = costs[allowed].min()
+            choices = np.flatnonzero(allowed & (costs == cost))
+            hospital, replacement = moves[random.choice(choices)]
+
+            tabu.append(hospital)
+            self.relocate(distances, hospital, replacement)
+            if cost < best_cost:
+                best_cost = cost
+                best_hospitals = self.hospitals.copy()
+                if log:
+                    print(f"{step}: Found new best state: cost {best_cost}")
+            self.record(best_cost)
+
+        self.hospitals = best_hospitals
+        return self.hospitals
+
+    def initialize(self):
+        """Places hospitals randomly."""
+        self.hospitals = set()
+        for i in range(self.num_hospitals):
+            self.add_hospital(self.random_space())
+
+    def moves(self):
+        """Returns all `(hospital, replacement)` moves to a neighbor."""
+        return [
+            (hospital, replacement)
+            for hospital in self.hospitals
+            for replacement in self.get_neighbors(*hospital)
+        ]
+
+    def relocate(self, distances, hospital, replacement):
+        """Moves `hospital` to `replacement`."""
+        self.remove_hospital(hospital)
+        self.add_hospital(replacement)
+        distances.move(hospital, replacement)
+
+    def start_history(self, cost):
+        """Starts recording `(seconds, cost)` pairs of a local search."""
+        self.start = time.time()
+        self.history = [(0, cost)]
+
+    def record(self, cost):
+        """Records the cost of the current step of a local search."""
+        self.history.append((time.time() - self.start, cost))
+
+    def random_restart(self, maximum, image_prefix=None, log=False,
+                       animation=None):
         """Repeats hill-climbing multiple times."""
         best_hospitals = None
         best_cost = None
 
         # Repeat hill-climbing a fixed number of times
-        for i in range(maximum):
-            hospitals = self.hill_climb()
-            cost = self.get_cost(hospitals)
-            if best_cost is None or cost < best_cost:
-                best_cost = cost
-                best_hospitals = hospitals
-                if log:
-                    print(f"{i}: Found new best state: cost {cost}")
-            else:
-                if log:
-                    print(f"{i}: Found state: cost {cost}")
-
-            if image_prefix:
-                self.output_image(f"{image_prefix}{str(i).zfill(3)}.png")
+        with Frames(self, image_prefix, animation) as frames:
+            for i in range(maximum):
+                hospitals = self.hill_climb()
+                cost = self.get_cost(hospitals)
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    best_hospitals = hospitals
+                    if log:
+                        print(f"{i}: Found new best state: cost {cost}")
+                else:
+                    if log:
+                        print(f"{i}: Found state: cost {cost}")
+
+                frames.add(i)
 
         return best_hospitals
 
+    def parallel_restart(self, maximum, processes=None, target=None,
+                         seed=None, log=False):
+        """
+        Repeats hill-climbing `maximum` times in a pool of `processes`
+        workers, each restart with its own seeded random stream, stopping
+        early once a state with cost at most `target` is found.
+
+        Returns the best hospitals found and statistics on the restarts.
+        """
+        # Send workers only what is needed to rebuild the space, rather
+        # than its free cell index and cached images
+        seeds = np.random.SeedSequence(seed).spawn(maximum)
+        houses = sorted(self.houses)
+        tasks = [
+            (self.height, self.width, self.num_hospitals, houses,
+             s.generate_state(1)[0])
+            for s in seeds
+        ]
+
+        best_hospitals = None
+        best_cost = None
+        results = []
+        with Pool(processes) as pool:
+            for hospitals, cost, iterations, seconds in \
+                    pool.imap_unordered(restart, tasks):
+                i = len(results)
+                results.append((cost, iterations, seconds))
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    best_hospitals = hospitals
+                    if log:
+                        print(f"{i}: Found new best state: cost {cost}")
+                else:
+                    if log:
+                        print(f"{i}: Found state: cost {cost}")
+                if target is not None and cost <= target:
+                    pool.terminate()
+                    break
+
+        costs, iterations, seconds = zip(*results)
+        stats = {
+            "restarts": len(results),
+            "best_cost": min(costs),
+            "mean_cost": sum(costs) / len(costs),
+            "mean_iterations": sum(iterations) / len(iterations),
+            "mean_time": sum(seconds) / len(seconds)
+        }
+        return best_hospitals, stats
+
     def get_cost(self, hospitals):
         """Calculates sum of distances from houses to nearest hospital."""
         cost = 0
@@ -127,34 +419,49 @@ class Space():
         ]
         neighbors = []
         for r, c in candidates:
-            if (r, c) in self.houses or (r, c) in self.hospitals:
-                continue
-            if 0 <= r < self.height and 0 <= c < self.width:
+            if 0 <= r < self.height and 0 <= c < self.width \
+                    and self.is_available((r, c)):
                 neighbors.append((r, c))
         return neighbors
 
     def output_image(self, filename):
         """Generates image with all houses and hospitals."""
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        cost_size = 40
-        padding = 10
+        self.render().save(filename)
+
+    def render(self):
+        """Returns an image with all houses, hospitals and the cost."""
+        from PIL import ImageDraw
+        house, hospital, font = load_assets()
+
+        # Houses only move between searches, so draw them once
+        if self.background is None:
+            self.background = self.draw_background(house)
+
+        img = self.background.copy()
+        for i, j in self.hospitals:
+            corner = (j * CELL_SIZE + CELL_BORDER, i * CELL_SIZE + CELL_BORDER)
+            img.paste(hospital, corner, hospital)
+
+        # Add cost
+        ImageDraw.Draw(img).text(
+            (PADDING, self.height * CELL_SIZE + PADDING),
+            f"Cost: {self.get_cost(self.hospitals)}",
+            fill="white",
+            font=font
+        )
+        return img
+
+    def draw_background(self, house):
+        """Returns an image of the grid with all houses."""
+        from PIL import Image, ImageDraw
 
         # Create a blank canvas
         img = Image.new(
             "RGBA",
-            (self.width * cell_size,
-             self.height * cell_size + cost_size + padding * 2),
+            (self.width * CELL_SIZE,
+             self.height * CELL_SIZE + COST_SIZE + PADDING * 2),
             "white"
         )
-        house = Image.open("assets/images/House.png").resize(
-            (cell_size, cell_size)
-        )
-        hospital = Image.open("assets/images/Hospital.png").resize(
-            (cell_size, cell_size)
-        )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 30)
         draw = ImageDraw.Draw(img)
 
         for i in range(self.height):
@@ -162,38 +469,185 @@ class Space():
 
                 # Draw cell
                 rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
+                    (j * CELL_SIZE + CELL_BORDER,
+                     i * CELL_SIZE + CELL_BORDER),
+                    ((j + 1) * CELL_SIZE - CELL_BORDER,
+                     (i + 1) * CELL_SIZE - CELL_BORDER)
                 ]
                 draw.rectangle(rect, fill="black")
 
                 if (i, j) in self.houses:
                     img.paste(house, rect[0], house)
-                if (i, j) in self.hospitals:
-                    img.paste(hospital, rect[0], hospital)
 
-        # Add cost
+        # Leave room for the cost
         draw.rectangle(
-            (0, self.height * cell_size, self.width * cell_size,
-             self.height * cell_size + cost_size + padding * 2),
+            (0, self.height * CELL_SIZE, self.width * CELL_SIZE,
+             self.height * CELL_SIZE + COST_SIZE + PADDING * 2),
             "black"
         )
-        draw.text(
-            (padding, self.height * cell_size + padding),
-            f"Cost: {self.get_cost(self.hospitals)}",
-            fill="white",
-            font=font
+        return img
+
+
+@lru_cache(maxsize=None)
+def load_assets():
+    """Returns the house and hospital images and the font, loaded once."""
+    from PIL import Image, ImageFont
+    house = Image.open("assets/images/House.png").resize(
+        (CELL_SIZE, CELL_SIZE)
+    )
+    hospital = Image.open("assets/images/Hospital.png").resize(
+        (CELL_SIZE, CELL_SIZE)
+    )
+    font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 30)
+    return house, hospital, font
+
+
+class Frames():
+
+    def __init__(self, space, image_prefix=None, animation=None, duration=500):
+        """
+        Collect images of the steps of a local search on `space`, saving
+        each one to a numbered file starting with `image_prefix` and
+        streaming them to a background thread that writes them all to
+        the animated image `animation`, showing each for `duration`
+        milliseconds.
+        """
+        self.space = space
+        self.image_prefix = image_prefix
+        self.animation = animation
+        self.duration = duration
+        self.queue = queue.Queue()
+        self.thread = None
+        if animation:
+            self.thread = threading.Thread(target=self.write, daemon=True)
+            self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, n):
+        """Adds an image of the current state as frame `n`."""
+        if not self.image_prefix and self.thread is None:
+            return
+        img = self.space.render()
+        if self.image_prefix:
+            img.save(f"{self.image_prefix}{str(n).zfill(3)}.png")
+        if self.thread is not None:
+            self.queue.put(img)
+
+    def write(self):
+        """Encodes frames as they arrive and writes the animation."""
+        frames = []
+        while (img := self.queue.get()) is not None:
+            frames.append(img.convert("RGB").quantize())
+        if frames:
+            frames[0].save(
+                self.animation, save_all=True, append_images=frames[1:],
+                duration=self.duration, loop=0
+            )
+
+    def close(self):
+        """Waits for the animation to be written."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+def exponential_schedule(initial=100, decay=0.995):
+    """Returns a schedule whose temperature decays geometrically."""
+    return lambda step: initial * decay ** step
+
+
+def linear_schedule(initial=100, steps=1000):
+    """Returns a schedule whose temperature drops to 0 after `steps`."""
+    return lambda step: max(0, initial * (1 - step / steps))
+
+
+def restart(task):
+    """Runs one hill-climbing restart of a space with a given seed."""
+    height, width, num_hospitals, houses, seed = task
+    space = Space(height, width, num_hospitals)
+    for house in houses:
+        space.add_house(*house)
+    random.seed(int(seed))
+    start = time.time()
+    hospitals = space.hill_climb()
+    return (hospitals, space.get_cost(hospitals), space.iterations,
+            time.time() - start)
+
+
+class Distances():
+
+    def __init__(self, houses, hospitals):
+        """
+        Keep track of the distance from every house to its nearest and
+        second-nearest hospital, so that the cost of moving one hospital
+        can be computed without measuring every other hospital again.
+        """
+        self.houses = np.array(sorted(houses), dtype=np.int64).reshape(-1, 2)
+        self.hospitals = list(hospitals)
+        self.distances = np.stack(
+            [self.distance(hospital) for hospital in self.hospitals], axis=1
         )
+        self.update()
+
+    def distance(self, cell):
+        """Return the distance from every house to `cell`."""
+        return np.abs(self.houses - cell).sum(axis=1)
+
+    def update(self):
+        """Find the nearest and second-nearest hospital of every house."""
+        self.nearest = self.distances.argmin(axis=1)
+        rows = np.arange(len(self.houses))
+        self.first = self.distances[rows, self.nearest]
+        if len(self.hospitals) > 1:
+            others = self.distances.copy()
+            others[rows, self.nearest] = np.iinfo(np.int64).max
+            self.second = others.min(axis=1)
+        else:
+            self.second = np.full(len(self.houses), np.iinfo(np.int64).max)
+
+    def cost(self):
+        """Return the sum of distances from houses to nearest hospital."""
+        return int(self.first.sum())
+
+    def move_costs(self, moves):
+        """
+        Return an array with the cost after each move in `moves`, a list
+        of `(hospital, replacement)` pairs.
+        """
+        index = np.array([self.hospitals.index(h) for h, _ in moves])
+        cells = np.array([r for _, r in moves], dtype=np.int64)
+
+        # Houses served by the moved hospital fall back to their
+        # second-nearest one, unless the new location is closer
+        distance = np.abs(self.houses[None, :, :] - cells[:, None, :]).sum(axis=2)
+        remaining = np.where(
+            self.nearest[None, :] == index[:, None],
+            self.second[None, :], self.first[None, :]
+        )
+        return np.minimum(remaining, distance).sum(axis=1)
+
+    def move(self, hospital, replacement):
+        """Move `hospital` to `replacement`."""
+        i = self.hospitals.index(hospital)
+        self.hospitals[i] = replacement
+        self.distances[:, i] = self.distance(replacement)
+        self.update()
 
-        img.save(filename)
 
+if __name__ == "__main__":
 
-# Create a new space and add houses randomly
-s = Space(height=10, width=20, num_hospitals=3)
-for i in range(15):
-    s.add_house(random.randrange(s.height), random.randrange(s.width))
+    # Create a new space and add houses randomly
+    s = Space(height=10, width=20, num_hospitals=3)
+    for i in range(15):
+        s.add_house(random.randrange(s.height), random.randrange(s.width))
 
-# Use local search to determine hospital placement
-hospitals = s.hill_climb(image_prefix="hospitals", log=True)
+    # Use local search to determine hospital placement
+    hospitals = s.hill_climb(
+        image_prefix="hospitals", log=True, animation="hospitals.gif"
+    )
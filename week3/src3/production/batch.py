@@ -0,0 +1,190 @@
+import csv
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import scipy.optimize
+
+from production import A_UB, B_UB, COSTS
+
+# Methods tried when choosing how to solve a batch
+METHODS = ["highs-ds", "highs-ipm", "highs"]
+
+# Scenarios sent to a worker at a time
+CHUNK_SIZE = 64
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit(
+            "Usage: python batch.py (scenarios.csv|count) output.csv "
+            "[processes] [method]"
+        )
+    processes = int(sys.argv[3]) if len(sys.argv) >= 4 else None
+    method = sys.argv[4] if len(sys.argv) == 5 else "auto"
+
+    if sys.argv[1].isdigit():
+        scenarios = perturb(int(sys.argv[1]))
+    else:
+        scenarios = load_scenarios(sys.argv[1])
+
+    if method == "auto":
+        method = select_method(scenarios)
+        print(f"Selected method {method}")
+
+    start = time.time()
+    results = run(scenarios, processes, method)
+    seconds = time.time() - start
+    save_results(results, sys.argv[2])
+
+    # Report latency of individual solves and overall throughput
+    latency = np.array([result["seconds"] for result in results]) * 1000
+    solved = sum(result["status"] == 0 for result in results)
+    print(f"Solved {solved} of {len(results)} scenarios in {seconds:.2f}s "
+          f"({len(results) / seconds:.0f} per second)")
+    print(f"Latency: mean {latency.mean():.3f}ms, "
+          f"p50 {np.percentile(latency, 50):.3f}ms, "
+          f"p95 {np.percentile(latency, 95):.3f}ms, "
+          f"p99 {np.percentile(latency, 99):.3f}ms")
+
+
+def scenarios_from_arrays(costs, A_ub, b_ub, names=None):
+    """
+    Return a list of `(name, costs, A_ub, b_ub)` scenarios from arrays
+    with one scenario per row of their leading axis: `costs` of shape
+    (k, n), `A_ub` of shape (k, m, n) and `b_ub` of shape (k, m).
+
+    Arrays without the leading axis are shared by every scenario.
+    """
+    costs = np.asarray(costs, dtype=float)
+    A_ub = np.asarray(A_ub, dtype=float)
+    b_ub = np.asarray(b_ub, dtype=float)
+    count = max(
+        len(costs) if costs.ndim == 2 else 1,
+        len(A_ub) if A_ub.ndim == 3 else 1,
+        len(b_ub) if b_ub.ndim == 2 else 1
+    )
+    costs = np.broadcast_to(costs, (count,) + costs.shape[-1:])
+    A_ub = np.broadcast_to(A_ub, (count,) + A_ub.shape[-2:])
+    b_ub = np.broadcast_to(b_ub, (count,) + b_ub.shape[-1:])
+    if names is None:
+        names = [str(i) for i in range(count)]
+    return list(zip(names, costs, A_ub, b_ub))
+
+
+def load_scenarios(filename):
+    """
+    Load scenarios from a CSV file with one scenario per row and columns
+    `name`, `c0`...`cn` for the costs, `a0_0`...`am_n` for the inequality
+    coefficients and `b0`...`bm` for their bounds.
+    """
+    with open(filename) as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        fields = reader.fieldnames
+    n = sum(1 for field in fields if field.startswith("c"))
+    m = sum(1 for field in fields if field.startswith("b"))
+    costs = [[float(row[f"c{j}"]) for j in range(n)] for row in rows]
+    A_ub = [
+        [[float(row[f"a{i}_{j}"]) for j in range(n)] for i in range(m)]
+        for row in rows
+    ]
+    b_ub = [[float(row[f"b{i}"]) for i in range(m)] for row in rows]
+    names = [row["name"] for row in rows]
+    return scenarios_from_arrays(costs, A_ub, b_ub, names)
+
+
+def perturb(count, spread=0.2, seed=0):
+    """
+    Return `count` what-if scenarios of the production problem, with
+    every cost, coefficient and bound scaled by a random factor within
+    `spread` of 1.
+    """
+    rng = np.random.default_rng(seed)
+    costs = np.array(COSTS, dtype=float)
+    A_ub = np.array(A_UB, dtype=float)
+    b_ub = np.array(B_UB, dtype=float)
+    return scenarios_from_arrays(
+        costs * rng.uniform(1 - spread, 1 + spread, (count,) + costs.shape),
+        A_ub * rng.uniform(1 - spread, 1 + spread, (count,) + A_ub.shape),
+        b_ub * rng.uniform(1 - spread, 1 + spread, (count,) + b_ub.shape)
+    )
+
+
+def solve(task):
+    """
+    Solve a chunk of scenarios with a method and return a dictionary
+    describing the result of each, including the seconds it took.
+    """
+    scenarios, method = task
+    results = []
+    for name, costs, A_ub, b_ub in scenarios:
+        start = time.perf_counter()
+        result = scipy.optimize.linprog(
+            costs, A_ub=A_ub, b_ub=b_ub, method=method
+        )
+        results.append({
+            "name": name,
+            "status": result.status,
+            "objective": result.fun if result.success else None,
+            "x": list(result.x) if result.success else None,
+            "seconds": time.perf_counter() - start
+        })
+    return results
+
+
+def select_method(scenarios, methods=METHODS, trials=20):
+    """
+    Return the method of `methods` solving the first `trials` scenarios
+    fastest, since scenarios of a batch tend to have the same structure.
+    """
+    times = dict()
+    for method in methods:
+        results = solve((scenarios[:trials], method))
+        times[method] = sum(result["seconds"] for result in results)
+    return min(times, key=times.get)
+
+
+def run(scenarios, processes=None, method="highs", chunk_size=CHUNK_SIZE):
+    """
+    Solve `scenarios` with `method` in a pool of `processes` workers,
+    sending them `chunk_size` scenarios at a time.
+
+    Return the results of `solve` in the order of `scenarios`.
+    """
+    tasks = [
+        (scenarios[i:i + chunk_size], method)
+        for i in range(0, len(scenarios), chunk_size)
+    ]
+    results = []
+    with Pool(processes) as pool:
+        for chunk in pool.imap(solve, tasks):
+            results.extend(chunk)
+    return results
+
+
+def save_results(results, filename):
+    """
+    Write one CSV row per result with its name, status, objective
+    value, solution and solve time.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "status", "objective", "x", "seconds"])
+        for result in results:
+            writer.writerow([
+                result["name"],
+                result["status"],
+                "" if result["objective"] is None else f"{result['objective']:.6g}",
+                "" if result["x"] is None else " ".join(
+                    f"{value:.6g}" for value in result["x"]
+                ),
+                f"{result['seconds']:.6f}"
+            ])
+
+
+if __name__ == "__main__":
+    main()
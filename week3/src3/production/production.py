@@ -3,15 +3,15 @@ import scipy.optimize
 # Objective Function: 50x_1 + 80x_2
 # Constraint 1: 5x_1 + 2x_2 <= 20
 # Constraint 2: -10x_1 + -12x_2 <= -90
+COSTS = [50, 80]  # Cost function: 50x_1 + 80x_2
+A_UB = [[5, 2], [-10, -12]]  # Coefficients for inequalities
+B_UB = [20, -90]  # Constraints for inequalities: 20 and -90
 
-result = scipy.optimize.linprog(
-    [50, 80],  # Cost function: 50x_1 + 80x_2
-    A_ub=[[5, 2], [-10, -12]],  # Coefficients for inequalities
-    b_ub=[20, -90],  # Constraints for inequalities: 20 and -90
-)
+if __name__ == "__main__":
+    result = scipy.optimize.linprog(COSTS, A_ub=A_UB, b_ub=B_UB)
 
-if result.success:
-    print(f"X1: {round(result.x[0], 2)} hours")
-    print(f"X2: {round(result.x[1], 2)} hours")
-else:
-    print("No solution")
+    if result.success:
+        print(f"X1: {round(result.x[0], 2)} hours")
+        print(f"X2: {round(result.x[1], 2)} hours")
+    else:
+        print("No solution")
@@ -0,0 +1,98 @@
+import random
+import sys
+import time
+from multiprocessing import Pool, TimeoutError
+
+import schedule0
+from csp import CSP, DAYS
+
+# Numbers of variables of the random instances
+SIZES = [20, 50, 100, 200, 500]
+
+SOLVERS = ["schedule0", "python-constraint", "forward", "ac3"]
+
+
+def random_instance(n, degree, seed):
+    """
+    Returns the variables and constraints of a random graph colouring
+    instance with `n` variables and about `degree` constraints per
+    variable, built around a hidden colouring so it always has a solution.
+    """
+    rng = random.Random(seed)
+    variables = [f"V{i}" for i in range(n)]
+    colours = {var: rng.randrange(len(DAYS)) for var in variables}
+
+    # About a third of all pairs are coloured alike and never constrained
+    p = min(1, 1.5 * degree / n)
+    constraints = [
+        (x, y)
+        for i, x in enumerate(variables)
+        for y in variables[i + 1:]
+        if colours[x] != colours[y] and rng.random() < p
+    ]
+    return variables, constraints
+
+
+def solve(task):
+    """Solves an instance with a solver and returns the seconds taken."""
+    solver, variables, constraints = task
+    start = time.time()
+    if solver == "schedule0":
+        schedule0.VARIABLES = variables
+        schedule0.CONSTRAINTS = constraints
+        solution = schedule0.backtrack(dict())
+    elif solver == "python-constraint":
+        from constraint import Problem
+        problem = Problem()
+        problem.addVariables(variables, DAYS)
+        for x, y in constraints:
+            problem.addConstraint(lambda x, y: x != y, (x, y))
+        solution = problem.getSolution()
+    else:
+        solution = CSP(variables, constraints, inference=solver).solve()
+    if solution is None:
+        raise Exception("no solution found")
+    return time.time() - start
+
+
+def timed(task, timeout):
+    """
+    Returns the seconds taken to solve `task`, or None if it takes
+    longer than `timeout` seconds.
+    """
+    with Pool(1) as pool:
+        try:
+            return pool.apply_async(solve, (task,)).get(timeout)
+        except TimeoutError:
+            return None
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [1, 2, 3]:
+        sys.exit("Usage: python benchmark.py [degree] [timeout]")
+    degree = float(sys.argv[1]) if len(sys.argv) >= 2 else 4
+    timeout = float(sys.argv[2]) if len(sys.argv) == 3 else 10
+
+    solvers = SOLVERS
+    try:
+        import constraint
+    except ImportError:
+        print("python-constraint is not installed, skipping it")
+        solvers = [solver for solver in SOLVERS if solver != "python-constraint"]
+
+    print(f"{'variables':>9} {'constraints':>11}" + "".join(
+        f"{solver:>18}" for solver in solvers
+    ))
+    for n in SIZES:
+        variables, constraints = random_instance(n, degree, seed=n)
+        line = f"{n:>9} {len(constraints):>11}"
+        for solver in solvers:
+            seconds = timed((solver, variables, constraints), timeout)
+            line += f"{'timeout':>18}" if seconds is None else f"{seconds:>18.4f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import sys
+import time
+
+from benchmark import random_instance
+from csp import CSP
+from schedule0 import CONSTRAINTS, VARIABLES
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [1, 3]:
+        sys.exit("Usage: python count.py [variables degree]")
+    if len(sys.argv) == 3:
+        variables, constraints = random_instance(
+            int(sys.argv[1]), float(sys.argv[2]), seed=0
+        )
+    else:
+        variables, constraints = VARIABLES, CONSTRAINTS
+
+    print(f"{'days':14} {'solutions':>12} {'seconds':>9} {'per second':>12}")
+    for name, interchangeable in [("distinct", False), ("interchangeable", True)]:
+        start = time.time()
+        count = CSP(variables, constraints).count(interchangeable)
+        seconds = time.time() - start
+        print(f"{name:14} {count:>12} {seconds:>9.3f} {count / seconds:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Backtracking search with a constraint graph, variable ordering heuristics
+and inference.
+"""
+
+from collections import deque
+
+DAYS = ["Monday", "Tuesday", "Wednesday"]
+
+
+def different(x, y):
+    """The constraint of the scheduling problem: values must differ."""
+    return x != y
+
+
+def flip(relation):
+    """Returns `relation` with its arguments swapped."""
+    if relation is different:
+        return different
+    return lambda x, y: relation(y, x)
+
+
+class CSP():
+
+    def __init__(self, variables, constraints, values=DAYS, inference="ac3"):
+        """
+        Create a constraint satisfaction problem where every variable in
+        `variables` takes one of `values`.
+
+        `constraints` is a list of `(x, y)` pairs of variables that must
+        take different values, as in `schedule0.CONSTRAINTS`, or of
+        `(x, y, relation)` triples where `relation(value_x, value_y)`
+        must be True.
+
+        `inference` is "ac3" to maintain arc consistency, "forward" for
+        forward checking, or None to only check assigned neighbors.
+        """
+        self.variables = list(variables)
+        self.values = list(values)
+        self.inference = inference
+
+        # `neighbors[x][y]` lists the relations between `x` and `y`
+        self.neighbors = {var: dict() for var in self.variables}
+        for constraint in constraints:
+            x, y = constraint[:2]
+            relation = constraint[2] if len(constraint) == 3 else different
+            self.neighbors[x].setdefault(y, []).append(relation)
+            self.neighbors[y].setdefault(x, []).append(flip(relation))
+        self.degrees = {
+            var: len(self.neighbors[var]) for var in self.variables
+        }
+
+        self.order = {value: i for i, value in enumerate(self.values)}
+        self.domains = {var: frozenset(self.values) for var in self.variables}
+
+        # Undo trail of `(var, domain)` pairs recording every domain
+        # replaced during search
+        self.trail = []
+
+        # Number of values tried and abandoned during search
+        self.backtracks = 0
+
+    def solve(self):
+        """
+        Return an assignment of a value to every variable satisfying all
+        constraints, or None if there is none.
+        """
+        if self.inference == "ac3" and not self.ac3():
+            return None
+        return self.backtrack(dict())
+
+    def solutions(self, interchangeable=False):
+        """
+        Generate every assignment satisfying all constraints, each as a
+        new dictionary, without first finding them all.
+
+        If `interchangeable` is True, only one of every group of
+        solutions that differ by a renaming of the values is generated.
+        """
+        for assignment in self.search(interchangeable):
+            yield dict(assignment)
+
+    def count(self, interchangeable=False):
+        """
+        Return the number of solutions, or with `interchangeable` the
+        number of groups of solutions that differ by a renaming of the
+        values, without storing any of them.
+        """
+        return sum(1 for _ in self.search(interchangeable))
+
+    def search(self, interchangeable=False):
+        """
+        Generate every solution as the same dictionary, changed in place
+        as search goes on.
+        """
+        if interchangeable and any(
+            relations != [different]
+            for neighbors in self.neighbors.values()
+            for relations in neighbors.values()
+        ):
+            raise Exception("values are interchangeable only if all differ")
+
+        # Restore the domains even if the caller stops early
+        mark = len(self.trail)
+        try:
+            if self.inference != "ac3" or self.ac3():
+                yield from self.extend(dict(), interchangeable, 0)
+        finally:
+            self.undo(mark)
+
+    def extend(self, assignment, interchangeable, used):
+        """
+        Generate every solution extending `assignment`, in which the
+        first `used` values are used.
+
+        If `interchangeable` is True, a variable may only take a used
+        value or the first unused one, so that values are always first
+        used in order.
+        """
+        if len(assignment) == len(self.variables):
+            yield assignment
+            return
+
+        var = self.select_unassigned_variable(assignment)
+        for value in self.order_domain_values(var, assignment):
+            if interchangeable and self.order[value] > used:
+                break
+            if not self.consistent_with(var, value, assignment):
+                continue
+            mark = len(self.trail)
+            assignment[var] = value
+            if self.infer(var, value, assignment):
+                yield from self.extend(
+                    assignment, interchangeable,
+                    max(used, self.order[value] + 1)
+                )
+            self.undo(mark)
+            del assignment[var]
+
+    def satisfies(self, x, value_x, y, value_y):
+        """Returns whether `x = value_x` and `y = value_y` are consistent."""
+        return all(
+            relation(value_x, value_y) for relation in self.neighbors[x][y]
+        )
+
+    def revise(self, x, y):
+        """
+        Make variable `x` arc consistent with variable `y`, removing the
+        values of `x` with no consistent value of `y`.
+
+        Return True if the domain of `x` was revised.
+        """
+        domain_x = self.domains[x]
+        domain_y = self.domains[y]
+
+        # A value of `x` can only lack a different value of `y` if
+        # that value is the only one left
+        if self.neighbors[x][y] == [different]:
+            if len(domain_y) != 1 or not domain_y <= domain_x:
+                return False
+            revised = domain_x - domain_y
+        else:
+            revised = frozenset(
+                value_x for value_x in domain_x
+                if any(
+                    self.satisfies(x, value_x, y, value_y)
+                    for value_y in domain_y
+                )
+            )
+
+        if revised == domain_x:
+            return False
+        self.narrow(x, revised)
+        return True
+
+    def ac3(self, arcs=None):
+        """
+        Make every arc in `arcs` arc consistent, revisiting the arcs into
+        any revised variable. If `arcs` is None, begin with all arcs.
+
+        Return False if some domain ends up empty.
+        """
+        if arcs is None:
+            arcs = [(x, y) for x in self.variables for y in self.neighbors[x]]
+
+        # Queue of arcs still to revise, each queued at most once
+        queue = deque(arcs)
+        queued = set(arcs)
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
+            if self.revise(x, y):
+                if not self.domains[x]:
+                    return False
+                for z in self.neighbors[x]:
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
+        return True
+
+    def narrow(self, var, domain):
+        """
+        Replace the domain of `var` with `domain`, recording the old
+        domain on the trail so that `undo` can restore it.
+        """
+        self.trail.append((var, self.domains[var]))
+        self.domains[var] = domain
+
+    def undo(self, mark):
+        """
+        Restore every domain narrowed since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
+    def infer(self, var, value, assignment):
+        """
+        Reduce the domain of `var` to `value` and, depending on the
+        inference method, remove inconsistent values from the domains of
+        its unassigned neighbors and propagate further with AC-3.
+
+        Return False if some domain ends up empty.
+        """
+        self.narrow(var, frozenset([value]))
+        arcs = [(y, var) for y in self.neighbors[var] if y not in assignment]
+        if self.inference == "ac3":
+            return self.ac3(arcs)
+        if self.inference == "forward":
+            for y, _ in arcs:
+                if self.revise(y, var) and not self.domains[y]:
+                    return False
+        return True
+
+    def consistent_with(self, var, value, assignment):
+        """
+        Returns whether assigning `value` to `var` is consistent with the
+        assigned neighbors of `var`.
+        """
+        return all(
+            self.satisfies(var, value, y, assignment[y])
+            for y in self.neighbors[var] if y in assignment
+        )
+
+    def order_domain_values(self, var, assignment):
+        """Returns the values of `var` in the order they were given."""
+        return sorted(self.domains[var], key=self.order.__getitem__)
+
+    def select_unassigned_variable(self, assignment):
+        """
+        Chooses the unassigned variable with the fewest remaining values,
+        then the highest degree.
+        """
+        return min(
+            (var for var in self.variables if var not in assignment),
+            key=lambda var: (len(self.domains[var]), -self.degrees[var])
+        )
+
+    def backtrack(self, assignment):
+        """Runs backtracking search to find an assignment."""
+
+        # Check if assignment is complete
+        if len(assignment) == len(self.variables):
+            return dict(assignment)
+
+        var = self.select_unassigned_variable(assignment)
+        for value in self.order_domain_values(var, assignment):
+            if not self.consistent_with(var, value, assignment):
+                continue
+            mark = len(self.trail)
+            assignment[var] = value
+            if self.infer(var, value, assignment):
+                result = self.backtrack(assignment)
+                if result is not None:
+                    return result
+            self.undo(mark)
+            del assignment[var]
+            self.backtracks += 1
+        return None
+
+
+if __name__ == "__main__":
+    from schedule0 import CONSTRAINTS, VARIABLES
+    print(CSP(VARIABLES, CONSTRAINTS).solve())
@@ -61,5 +61,6 @@ def consistent(assignment):
     return True
 
 
-solution = backtrack(dict())
-print(solution)
+if __name__ == "__main__":
+    solution = backtrack(dict())
+    print(solution)
@@ -1,5 +1,8 @@
 import random
 import time
+from collections.abc import MutableMapping
+from functools import lru_cache, reduce
+from operator import xor
 
 
 class Nim():
@@ -69,6 +72,58 @@ class Nim():
             self.winner = self.player
 
 
+class QTable(MutableMapping):
+
+    def __init__(self):
+        """
+        Map `(state, action)` pairs to Q-values like a dictionary, while
+        grouping them by state so that all Q-values of a state can be
+        found without scanning the whole table.
+        """
+        self.states = dict()
+        self.size = 0
+
+    def __getitem__(self, key):
+        state, action = key
+        return self.states[state][action]
+
+    def __setitem__(self, key, value):
+        state, action = key
+        values = self.states.setdefault(state, dict())
+        if action not in values:
+            self.size += 1
+        values[action] = value
+
+    def __delitem__(self, key):
+        state, action = key
+        del self.states[state][action]
+        self.size -= 1
+        if not self.states[state]:
+            del self.states[state]
+
+    def __iter__(self):
+        for state, values in self.states.items():
+            for action in values:
+                yield (state, action)
+
+    def __len__(self):
+        return self.size
+
+    def get(self, key, default=None):
+        state, action = key
+        values = self.states.get(state)
+        if values is None:
+            return default
+        return values.get(action, default)
+
+    def actions(self, state):
+        """
+        Return a dictionary mapping every action with a Q-value in
+        `state` to that Q-value.
+        """
+        return self.states.get(state, {})
+
+
 class NimAI():
 
     def __init__(self, alpha=0.5, epsilon=0.1):
@@ -81,7 +136,7 @@ class NimAI():
          - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
          - `action` is a tuple `(i, j)` for an action
         """
-        self.q = dict()
+        self.q = QTable()
         self.alpha = alpha
         self.epsilon = epsilon
 
@@ -141,8 +196,7 @@ class NimAI():
         Q-value in `self.q`. If there are no available actions in
         `state`, return 0.
         """
-        state = tuple(state)
-        rewards = [q for k, q in self.q.items() if k[0] == state]
+        rewards = self.q.actions(tuple(state)).values()
         # print(f"best_future_reward {rewards=}")
         return max(rewards) if rewards else 0
 
@@ -164,7 +218,8 @@ class NimAI():
         # print(f"{state=}")
         # print(f"{epsilon=}")
         # print(f"{self.q=}")
-        actions = {a:self.get_q_value(state, a) for a in Nim.available_actions(state)}
+        values = self.q.actions(tuple(state))
+        actions = {a: values.get(a, 0) for a in action_list(tuple(state))}
         # print(f"{actions}")
         if epsilon:
             if random.random() <= self.epsilon:
@@ -237,6 +292,147 @@ def train(n):
     return player
 
 
+def train_quietly(n, interval=10000, initial=(1, 3, 5, 7), player=None):
+    """
+    Train an AI, or continue training `player`, by playing `n` games
+    against itself without printing every game, reporting progress every
+    `interval` games instead, or never if `interval` is None.
+
+    Each report gives the games played per second, the size of the
+    Q-table, the mean change of a Q-value per update and the share of
+    winning states in which the AI's best moves all win.
+    """
+    if player is None:
+        player = NimAI()
+    start = time.time()
+    change = 0
+    updates = 0
+
+    for i in range(n):
+        game_change, game_updates = self_play(player, initial)
+        change += game_change
+        updates += game_updates
+
+        if interval and ((i + 1) % interval == 0 or i + 1 == n):
+            seconds = time.time() - start
+            print(
+                f"{i + 1} games, {(i + 1) / seconds:.0f} games/s, "
+                f"{len(player.q)} Q-values, "
+                f"mean change {change / max(updates, 1):.5f}, "
+                f"{optimal_share(player):.1%} optimal"
+            )
+            change = 0
+            updates = 0
+
+    return player
+
+
+def self_play(player, initial=(1, 3, 5, 7)):
+    """
+    Play one game of `player` against itself from the piles `initial`,
+    updating its Q-values after every move.
+
+    Return the total change of the Q-values and the number of updates.
+    """
+    change = 0
+    updates = 0
+
+    def learn(state, action, new_state, reward):
+        nonlocal change, updates
+        old = player.get_q_value(state, action)
+        player.update(state, action, new_state, reward)
+        change += abs(player.get_q_value(state, action) - old)
+        updates += 1
+
+    state = tuple(initial)
+    turn = 0
+
+    # Last state and action of each player
+    last = [None, None]
+
+    while True:
+        action = player.choose_action(state)
+        new_state = result(state, action)
+        last[turn] = (state, action)
+        turn = 1 - turn
+
+        # The player who took the last item loses
+        if not any(new_state):
+            learn(state, action, new_state, -1)
+            learn(*last[turn], new_state, 1)
+            return change, updates
+        elif last[turn] is not None:
+            learn(*last[turn], new_state, 0)
+        state = new_state
+
+
+@lru_cache(maxsize=None)
+def action_list(state):
+    """
+    Return a list of the available actions in `state`, a tuple of piles,
+    computed only once per state.
+    """
+    return sorted(Nim.available_actions(state))
+
+
+def result(state, action):
+    """Return the piles after taking `action` in `state`, a tuple."""
+    pile, count = action
+    return state[:pile] + (state[pile] - count,) + state[pile + 1:]
+
+
+def nim_sum(piles):
+    """Return the exclusive or of all piles."""
+    return reduce(xor, piles, 0)
+
+
+def losing(piles):
+    """
+    Return whether the player to move loses against perfect play.
+
+    Since whoever takes the last item loses, this is when the nim-sum
+    is 0, unless no pile has more than one item, in which case it is
+    when an odd number of piles are left.
+    """
+    if all(pile <= 1 for pile in piles):
+        return sum(piles) % 2 == 1
+    return nim_sum(piles) == 0
+
+
+def perfect_action(piles):
+    """
+    Return an action leaving the other player in a losing state, or a
+    random action if there is none.
+    """
+    state = tuple(piles)
+    actions = action_list(state)
+    for action in actions:
+        if losing(result(state, action)):
+            return action
+    return random.choice(actions)
+
+
+def optimal_share(ai):
+    """
+    Return the share of the winning states with Q-values in which every
+    action with the highest Q-value is a winning move.
+    """
+    winning = 0
+    optimal = 0
+    for state, values in ai.q.states.items():
+        if losing(state):
+            continue
+        winning += 1
+        actions = {a: values.get(a, 0) for a in action_list(state)}
+        best = max(actions.values())
+        if all(
+            losing(result(state, action))
+            for action, q in actions.items() if q == best
+        ):
+            optimal += 1
+    return optimal / winning if winning else 0
+
+
 def play(ai, human_player=None):
     """
     Play human game against the AI.
@@ -0,0 +1,132 @@
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+from nim import Nim, NimAI, QTable, perfect_action, train_quietly
+
+# Rounds of self-play between merges of the workers' Q-tables
+ROUNDS = 10
+
+
+def worker(task):
+    """
+    Continue training a copy of a Q-table for a number of games and
+    return the Q-values learned, grouped by state.
+    """
+    states, games, seed = task
+    random.seed(seed)
+    player = NimAI()
+    player.q = table(states)
+    train_quietly(games, interval=None, player=player)
+    return player.q.states
+
+
+def table(states):
+    """Return a `QTable` with a copy of the Q-values in `states`."""
+    q = QTable()
+    for state, values in states.items():
+        for action, value in values.items():
+            q[state, action] = value
+    return q
+
+
+def merge(tables):
+    """
+    Return the Q-values of several tables grouped by state, averaging
+    each Q-value over the tables that have it.
+    """
+    totals = dict()
+    for states in tables:
+        for state, values in states.items():
+            merged = totals.setdefault(state, dict())
+            for action, value in values.items():
+                total, count = merged.get(action, (0, 0))
+                merged[action] = (total + value, count + 1)
+    return {
+        state: {
+            action: total / count for action, (total, count) in values.items()
+        }
+        for state, values in totals.items()
+    }
+
+
+def train_parallel(n, processes=None, rounds=ROUNDS, seed=None):
+    """
+    Train an AI by playing `n` games of self-play split between a pool
+    of `processes` workers, each training its own copy of the Q-table.
+    After each of `rounds` rounds, the copies are averaged into the
+    table every worker continues from.
+    """
+    rng = random.Random(seed)
+    processes = processes or os.cpu_count()
+    states = dict()
+    with Pool(processes) as pool:
+        for r in range(rounds):
+
+            # Spread this round's games evenly over the workers
+            games = n * (r + 1) // rounds - n * r // rounds
+            tasks = [
+                (
+                    states,
+                    games * (k + 1) // processes - games * k // processes,
+                    rng.random()
+                )
+                for k in range(processes)
+            ]
+            states = merge(pool.map(worker, tasks))
+
+    player = NimAI()
+    player.q = table(states)
+    return player
+
+
+def win_rate(ai, games, ai_player):
+    """
+    Return the share of `games` the AI wins against a perfect player
+    when the AI plays as player `ai_player`.
+    """
+    wins = 0
+    for i in range(games):
+        game = Nim()
+        while game.winner is None:
+            if game.player == ai_player:
+                game.move(ai.choose_action(game.piles, epsilon=False))
+            else:
+                game.move(perfect_action(game.piles))
+        wins += game.winner == ai_player
+    return wins / games
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python parallel.py games [processes]")
+    games = int(sys.argv[1])
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else os.cpu_count()
+    print(f"{os.cpu_count()} CPUs available")
+
+    # From the initial piles the first player loses against perfect
+    # play, so only playing second can be won
+    print(f"{'training':20} {'seconds':>8} {'speedup':>8} "
+          f"{'first':>7} {'second':>7}")
+    random.seed(0)
+    start = time.time()
+    ai = train_quietly(games, interval=None)
+    serial = time.time() - start
+    results = [("serial", serial, ai)]
+
+    for k in sorted({1, processes}):
+        start = time.time()
+        ai = train_parallel(games, k, seed=0)
+        results.append((f"{k} processes", time.time() - start, ai))
+
+    for name, seconds, ai in results:
+        print(f"{name:20} {seconds:>8.2f} {serial / seconds:>8.2f} "
+              f"{win_rate(ai, 1000, 0):>7.1%} {win_rate(ai, 1000, 1):>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
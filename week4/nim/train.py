@@ -0,0 +1,9 @@
+import sys
+
+from nim import train_quietly
+
+if len(sys.argv) not in [2, 3]:
+    sys.exit("Usage: python train.py games [interval]")
+games = int(sys.argv[1])
+interval = int(sys.argv[2]) if len(sys.argv) == 3 else 10000
+train_quietly(games, interval)